@@ -0,0 +1,131 @@
+import os
+import sys
+from difflib import SequenceMatcher
+from typing import Iterable, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.text_utils import normalize_text
+
+# Shortest answer that may be accepted as a misspelling; shorter ones go to the verifier
+MIN_TYPO_LENGTH = 8
+
+# Answers at least this long may be two edits away from a candidate instead of one
+TWO_TYPO_LENGTH = 12
+
+# Leading and trailing characters that must agree, so added or dropped prefixes and
+# suffixes ("staking" / "unstaking", "centralization" / "decentralization") never match
+TYPO_ANCHOR = 2
+
+# Similarity below which (with no shared words) an answer is rejected outright
+REJECT_SIMILARITY = 0.35
+
+_ARTICLES = {"a", "an", "the"}
+
+
+def _canonical(answer: str) -> str:
+    """Normalize an answer and drop leading articles ("the BNB chain" -> "bnb chain")."""
+    words = normalize_text(answer).split()
+    while len(words) > 1 and words[0] in _ARTICLES:
+        words = words[1:]
+    return " ".join(words)
+
+
+def _digits(answer: str) -> str:
+    return "".join(ch for ch in answer if ch.isdigit())
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between two strings, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _is_typo(user: str, candidate: str) -> bool:
+    """
+    Whether an answer is a plain misspelling of a candidate.
+
+    Only long answers qualify, within one edit (two for long answers), with the same
+    first and last characters and the same numbers ("Layer 1" is not "Layer 2").
+    """
+    length = min(len(user), len(candidate))
+    if length < MIN_TYPO_LENGTH:
+        return False
+    if user[:TYPO_ANCHOR] != candidate[:TYPO_ANCHOR] or user[-TYPO_ANCHOR:] != candidate[-TYPO_ANCHOR:]:
+        return False
+    if _digits(user) != _digits(candidate):
+        return False
+    limit = 2 if length >= TWO_TYPO_LENGTH else 1
+    return _edit_distance(user, candidate, limit) <= limit
+
+
+def parse_aliases(text: Optional[str]) -> List[str]:
+    """
+    Split the model's ALIASES section into a clean list.
+
+    Args:
+        text: Raw section text such as "BNB, bnb chain; Binance Smart Chain".
+
+    Returns:
+        Distinct, non-empty aliases in their original order.
+    """
+    if not text:
+        return []
+    aliases = []
+    for alias in text.replace(';', ',').replace('|', ',').replace('\n', ',').split(','):
+        alias = alias.strip().strip('[]"\'').strip()
+        if alias and alias.lower() not in ('none', 'n/a') and alias not in aliases:
+            aliases.append(alias)
+    return aliases
+
+
+def match_answer(user_answer: str, answer: str, aliases: Iterable[str] = ()) -> Optional[bool]:
+    """
+    Decide locally whether an answer matches the solution or one of its aliases.
+
+    Args:
+        user_answer: The submitted answer.
+        answer: The canonical correct answer.
+        aliases: Accepted alternative names and spellings.
+
+    Returns:
+        True for a match, False for a clear miss, or None when the answer is
+        ambiguous and should go to the verification model.
+    """
+    user = _canonical(user_answer)
+    if not user:
+        return False
+
+    candidates = {_canonical(candidate) for candidate in [answer, *aliases]}
+    candidates.discard("")
+    if not candidates:
+        return None
+    if user in candidates:
+        return True
+
+    user_words = set(user.split())
+    best_similarity = 0.0
+    shares_words = False
+    for candidate in candidates:
+        candidate_words = set(candidate.split())
+        if user_words == candidate_words:
+            # Same words in a different order
+            return True
+        shares_words = shares_words or bool(user_words & candidate_words)
+
+        if _is_typo(user, candidate):
+            return True
+        best_similarity = max(best_similarity, SequenceMatcher(None, user, candidate).ratio())
+
+    if best_similarity < REJECT_SIMILARITY and not shares_words:
+        return False
+    return None
@@ -0,0 +1,120 @@
+import os
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Estimated Jaccard similarity of word shingles at or above which a chunk is a near-duplicate of an earlier one
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.85'))
+
+# Lines found in at least this share of the sources (and in at least 3) are treated as navigation, header or footer
+BOILERPLATE_SOURCE_SHARE = float(os.getenv('BOILERPLATE_SOURCE_SHARE', '0.5'))
+
+# Chunks with fewer words left after stripping boilerplate are dropped
+MIN_CHUNK_WORDS = int(os.getenv('MIN_CHUNK_WORDS', '3'))
+
+# MinHash signature length, split into LSH bands of _ROWS rows; fixed seeds keep results stable across runs
+_PERMUTATIONS = 64
+_ROWS = 4
+_SHINGLE_SIZE = 3
+_rng = np.random.default_rng(2024)
+_MULTIPLIERS = _rng.integers(1, 2 ** 63, _PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_OFFSETS = _rng.integers(0, 2 ** 63, _PERMUTATIONS, dtype=np.uint64)
+
+
+def _normalize_line(line: str) -> str:
+    return " ".join(line.lower().split())
+
+
+def _minhash(text: str) -> np.ndarray:
+    """MinHash signature of a text's word shingles (hashed with CRC32 so it is the same in every process)."""
+    words = re.findall(r"\w+", text.lower())
+    shingles = {" ".join(words[i:i + _SHINGLE_SIZE]) for i in range(max(1, len(words) - _SHINGLE_SIZE + 1))}
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    # Multiply-add modulo 2**64 with odd multipliers permutes the hash space; keep the high bits
+    permuted = (_MULTIPLIERS[:, None] * hashes[None, :] + _OFFSETS[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1)
+
+
+def boilerplate_lines(documents: Sequence) -> set:
+    """
+    Find lines repeated across many sources, such as site navigation, headers and footers.
+
+    Args:
+        documents: LangChain Documents with a ``source`` in their metadata.
+
+    Returns:
+        Normalized lines present in at least BOILERPLATE_SOURCE_SHARE of the sources (and at least 3).
+    """
+    sources_per_line = defaultdict(set)
+    sources = set()
+    for doc in documents:
+        source = doc.metadata.get("source", "")
+        sources.add(source)
+        for line in doc.page_content.splitlines():
+            line = _normalize_line(line)
+            if line:
+                sources_per_line[line].add(source)
+
+    min_sources = max(3, BOILERPLATE_SOURCE_SHARE * len(sources))
+    return {line for line, line_sources in sources_per_line.items() if len(line_sources) >= min_sources}
+
+
+def filter_chunks(documents: Sequence) -> Tuple[List, Dict]:
+    """
+    Strip boilerplate and drop near-duplicate chunks before they are embedded.
+
+    Documents are processed grouped by source in a stable order, so the same
+    corpus always keeps the same chunks (and the same content hashes).
+
+    Args:
+        documents: LangChain Documents, as loaded and split.
+
+    Returns:
+        Tuple of (documents to index, report of what was stripped and dropped).
+    """
+    documents = sorted(documents, key=lambda doc: str(doc.metadata.get("source", "")))
+    boilerplate = boilerplate_lines(documents)
+
+    stripped, dropped_short = [], 0
+    lines_removed = Counter()
+    for doc in documents:
+        kept_lines = []
+        for line in doc.page_content.splitlines():
+            if _normalize_line(line) in boilerplate:
+                lines_removed[_normalize_line(line)] += 1
+            else:
+                kept_lines.append(line)
+        text = "\n".join(kept_lines).strip()
+        if len(re.findall(r"\w+", text)) < MIN_CHUNK_WORDS:
+            dropped_short += 1
+            continue
+        stripped.append(type(doc)(page_content=text, metadata=doc.metadata) if text != doc.page_content else doc)
+
+    # LSH: chunks sharing any band of their signature are compared; the earlier one is kept
+    kept, signatures = [], []
+    buckets = defaultdict(list)
+    near_duplicates = 0
+    for doc in stripped:
+        signature = _minhash(doc.page_content)
+        bands = [(band, signature[band:band + _ROWS].tobytes()) for band in range(0, _PERMUTATIONS, _ROWS)]
+        candidates = {position for key in bands for position in buckets.get(key, ())}
+        if any(np.mean(signatures[position] == signature) >= NEAR_DUPLICATE_THRESHOLD for position in candidates):
+            near_duplicates += 1
+            continue
+        for key in bands:
+            buckets[key].append(len(kept))
+        kept.append(doc)
+        signatures.append(signature)
+
+    report = {
+        "chunks_in": len(documents),
+        "boilerplate_lines": len(boilerplate),
+        "boilerplate_lines_removed": sum(lines_removed.values()),
+        "dropped_short": dropped_short,
+        "dropped_near_duplicates": near_duplicates,
+        "chunks_out": len(kept)
+    }
+    return kept, report
@@ -0,0 +1,257 @@
+import os
+import json
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Iterable, Optional
+
+
+class ContentPool:
+    """
+    Background-filled pool of pre-generated items (questions, riddles, ...) per complexity level.
+
+    Requests take an item instantly with ``take``; one refill task per level keeps the
+    pool topped up. The target size follows the observed drain rate so that roughly
+    ``lead_time`` seconds of demand are always buffered. Items whose ``key`` was seen
+    among the last ``recent_size`` pooled items are dropped as duplicates.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        producer: Callable[[int], Awaitable[Optional[Dict]]],
+        levels: Iterable[int] = range(1, 6),
+        min_size: int = 2,
+        max_size: int = 50,
+        lead_time: float = 30.0,
+        rate_window: float = 60.0,
+        max_parallel: int = 4,
+        persist_path: Optional[str] = None,
+        key: Optional[Callable[[Dict], Hashable]] = None,
+        recent_size: int = 1000
+    ):
+        """
+        Args:
+            name: Pool name used in logs and stats.
+            producer: Coroutine generating one parsed item for a level, or None on failure.
+            levels: Complexity levels to keep filled.
+            min_size: Items kept per level even when idle.
+            max_size: Hard cap on items per level.
+            lead_time: Seconds of observed demand to keep buffered.
+            rate_window: Seconds of history used to estimate the drain rate.
+            max_parallel: Maximum concurrent producer calls per level.
+            persist_path: JSON file the pool is loaded from and saved to.
+            key: Identity of an item for deduplication, e.g. its normalized text.
+            recent_size: Number of recent item keys remembered for deduplication.
+        """
+        self.name = name
+        self.producer = producer
+        self.levels = list(levels)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.lead_time = lead_time
+        self.rate_window = rate_window
+        self.max_parallel = max_parallel
+        self.persist_path = persist_path
+        self.key = key
+        self.recent_size = recent_size
+
+        self._items: Dict[int, Deque[Dict]] = {level: deque() for level in self.levels}
+        self._takes: Dict[int, Deque[float]] = {level: deque() for level in self.levels}
+        self._wakeups: Dict[int, asyncio.Event] = {}
+        self._recent: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._tasks = []
+        self.served = 0
+        self.misses = 0
+        self.produced = 0
+        self.discarded = 0
+        self.duplicates = 0
+        self.failed = 0
+
+    def drain_rate(self, level: int) -> float:
+        """Items taken per second at this level over the recent window."""
+        takes = self._takes[level]
+        cutoff = time.monotonic() - self.rate_window
+        while takes and takes[0] < cutoff:
+            takes.popleft()
+        return len(takes) / self.rate_window
+
+    def target_size(self, level: int) -> int:
+        """Number of items the refill task aims to keep at this level."""
+        wanted = self.min_size + math.ceil(self.drain_rate(level) * self.lead_time)
+        return min(self.max_size, wanted)
+
+    def take(self, level: int) -> Optional[Dict]:
+        """
+        Pop a pre-generated item without waiting.
+
+        Args:
+            level: Complexity level.
+
+        Returns:
+            The item, or None when the pool for this level is empty.
+        """
+        level = self._clamp(level)
+        self._takes[level].append(time.monotonic())
+
+        items = self._items[level]
+        item = items.popleft() if items else None
+        if item is None:
+            self.misses += 1
+        else:
+            self.served += 1
+
+        if level in self._wakeups:
+            self._wakeups[level].set()
+        return item
+
+    def put(self, level: int, item: Dict) -> bool:
+        """
+        Add an item unless the level is full or the item repeats a recent one.
+
+        Args:
+            level: Complexity level.
+            item: The generated item.
+
+        Returns:
+            True if the item was added.
+        """
+        items = self._items[self._clamp(level)]
+        if len(items) >= self.max_size:
+            return False
+        if self.key is not None:
+            key = self.key(item)
+            if key in self._recent:
+                self.duplicates += 1
+                return False
+            self._recent[key] = None
+            if len(self._recent) > self.recent_size:
+                self._recent.popitem(last=False)
+        items.append(item)
+        return True
+
+    def _clamp(self, level: int) -> int:
+        return min(max(level, self.levels[0]), self.levels[-1])
+
+    async def produce(self, level: int) -> Optional[Dict]:
+        """
+        Run the producer once, recording whether its output was usable.
+
+        Producers return None for output that failed parsing or validation (counted as
+        discarded) and raise for failed calls such as quota or network errors (counted
+        as failed), so the discard rate measures generation quality only.
+
+        Args:
+            level: Complexity level.
+
+        Returns:
+            The generated item, or None if it was discarded or the call failed.
+        """
+        try:
+            item = await self.producer(self._clamp(level))
+        except Exception as e:
+            print(f"Error producing {self.name} item (level {level}): {e}")
+            self.failed += 1
+            return None
+
+        if item:
+            self.produced += 1
+        else:
+            self.discarded += 1
+        return item
+
+    async def _refill(self, level: int):
+        """Keep one level filled up to its target size."""
+        wakeup = self._wakeups[level]
+        backoff = 1.0
+        while True:
+            deficit = self.target_size(level) - len(self._items[level])
+            if deficit <= 0:
+                wakeup.clear()
+                try:
+                    # Also wake up periodically so the target shrinks as demand decays
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.rate_window)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = min(deficit, self.max_parallel)
+            results = await asyncio.gather(*(self.produce(level) for _ in range(batch)))
+            produced = 0
+            for result in results:
+                if result and self.put(level, result):
+                    produced += 1
+
+            if produced:
+                backoff = 1.0
+            else:
+                # Producer keeps failing (quota, outage) or repeating itself: back off instead of spinning
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def load(self):
+        """Load persisted items from disk."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            for level, items in saved.items():
+                level = int(level)
+                if level in self._items:
+                    for item in items[:self.max_size]:
+                        self.put(level, item)
+            print(f"Loaded {sum(len(v) for v in self._items.values())} items into {self.name} pool")
+        except Exception as e:
+            print(f"Error loading {self.name} pool: {e}")
+
+    def save(self):
+        """Persist the current items to disk atomically."""
+        if not self.persist_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.persist_path) or '.', exist_ok=True)
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({str(level): list(items) for level, items in self._items.items()}, file)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"Error saving {self.name} pool: {e}")
+
+    async def start(self):
+        """Load persisted items and start one refill task per level."""
+        if self._tasks:
+            return
+        self.load()
+        for level in self.levels:
+            self._wakeups[level] = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._refill(level)))
+
+    async def stop(self):
+        """Stop the refill tasks and persist the pool."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeups = {}
+        self.save()
+
+    def discard_rate(self) -> float:
+        """Fraction of completed generations that failed parsing or validation."""
+        attempts = self.produced + self.discarded
+        return self.discarded / attempts if attempts else 0.0
+
+    def stats(self) -> Dict:
+        """Return pool sizes, targets, hit counters and generation waste."""
+        return {
+            "sizes": {level: len(items) for level, items in self._items.items()},
+            "targets": {level: self.target_size(level) for level in self.levels},
+            "served": self.served,
+            "misses": self.misses,
+            "produced": self.produced,
+            "discarded": self.discarded,
+            "discard_rate": round(self.discard_rate(), 4),
+            "duplicates": self.duplicates,
+            "failed": self.failed
+        }
@@ -0,0 +1,122 @@
+import os
+import re
+import math
+from typing import Dict, List, Sequence
+
+# Token budget of the retrieved context plus chat history in each RAG prompt
+RAG_PROMPT_TOKENS = int(os.getenv('RAG_PROMPT_TOKENS', '2500'))
+
+# Most of that budget the chat history may take; whatever it leaves goes to context
+RAG_HISTORY_TOKENS = int(os.getenv('RAG_HISTORY_TOKENS', '600'))
+
+# Word-shingle Jaccard similarity above which a chunk counts as a duplicate of a kept one
+DUPLICATE_SIMILARITY = 0.8
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n+')
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on", "for", "and", "or",
+    "it", "its", "this", "that", "with", "as", "by", "at", "from", "what", "how", "why", "who",
+    "does", "do", "can", "i", "you", "me", "my", "your", "about", "tell"
+}
+
+# Tokens before and after packing, for /rag/health
+_stats = {"packed": 0, "tokens_in": 0, "tokens_out": 0, "chunks_in": 0, "chunks_dropped": 0}
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text locally, without calling the model.
+
+    Words count one token per four characters (rounded up) and punctuation one
+    each, which tracks SentencePiece-style tokenizers closely enough for budgeting.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _WORD.findall(text or ""))
+
+
+def _terms(text: str) -> set:
+    return {word for word in re.findall(r"\w+", text.lower()) if word not in _STOPWORDS}
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def dedupe_chunks(chunks: Sequence[str]) -> List[str]:
+    """Drop chunks whose word shingles mostly repeat an earlier (higher-ranked) chunk."""
+    kept, kept_shingles = [], []
+    for chunk in chunks:
+        if not chunk.strip():
+            continue
+        shingles = _shingles(chunk)
+        if any(len(shingles & other) / (len(shingles | other) or 1) > DUPLICATE_SIMILARITY for other in kept_shingles):
+            continue
+        kept.append(chunk)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def pack_context(question: str, chunks: Sequence[str], budget: int) -> str:
+    """
+    Fit retrieved chunks into a token budget.
+
+    Near-duplicate chunks are removed first. If the rest still exceeds the budget,
+    the sentences sharing the most terms with the question are kept (higher-ranked
+    chunks win ties) and re-assembled in their original order.
+
+    Args:
+        question: The user's question.
+        chunks: Retrieved chunk texts, most relevant first.
+        budget: Maximum tokens for the packed context.
+
+    Returns:
+        The packed context, chunks separated by blank lines.
+    """
+    unique = dedupe_chunks(chunks)
+    _stats["packed"] += 1
+    _stats["chunks_in"] += len(chunks)
+    _stats["chunks_dropped"] += len(chunks) - len(unique)
+    _stats["tokens_in"] += sum(count_tokens(chunk) for chunk in chunks)
+
+    if sum(count_tokens(chunk) for chunk in unique) <= budget:
+        packed = "\n\n".join(unique)
+        _stats["tokens_out"] += count_tokens(packed)
+        return packed
+
+    query_terms = _terms(question)
+    sentences = []
+    for rank, chunk in enumerate(unique):
+        for position, sentence in enumerate(s for s in _SENTENCE_END.split(chunk) if s.strip()):
+            sentence = sentence.strip()
+            tokens = count_tokens(sentence)
+            overlap = len(query_terms & _terms(sentence))
+            # Relevance per token, so long sentences must earn their space
+            score = overlap / math.sqrt(tokens or 1)
+            sentences.append((score, rank, position, sentence, tokens))
+
+    chosen, used = [], 0
+    for score, rank, position, sentence, tokens in sorted(sentences, key=lambda item: (-item[0], item[1], item[2])):
+        if used + tokens > budget:
+            continue
+        chosen.append((rank, position, sentence))
+        used += tokens
+
+    by_chunk: Dict[int, List[str]] = {}
+    for rank, position, sentence in sorted(chosen):
+        by_chunk.setdefault(rank, []).append(sentence)
+    packed = "\n\n".join(" ".join(sentences) for _, sentences in sorted(by_chunk.items()))
+    _stats["tokens_out"] += count_tokens(packed)
+    return packed
+
+
+def stats() -> Dict:
+    """Return packing counters and the average share of context tokens kept."""
+    return {
+        **_stats,
+        "budget": RAG_PROMPT_TOKENS,
+        "history_budget": RAG_HISTORY_TOKENS,
+        "kept_ratio": round(_stats["tokens_out"] / _stats["tokens_in"], 4) if _stats["tokens_in"] else 1.0
+    }
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+# Where the loaded and split corpus is kept between runs
+CORPUS_SNAPSHOT_PATH = os.getenv('CORPUS_SNAPSHOT_PATH', os.path.join('cache', 'corpus_snapshot.json'))
+
+# Seconds allowed for a conditional freshness check of one URL
+CORPUS_CHECK_TIMEOUT = float(os.getenv('CORPUS_CHECK_TIMEOUT', '15'))
+
+
+class CorpusSnapshot:
+    """
+    On-disk copy of the loaded and split documents of each source.
+
+    Each source keeps its chunks as ``[page_content, metadata]`` pairs together
+    with the validators needed to tell cheaply whether it changed: the ETag,
+    Last-Modified and body hash of a URL, or the modification time and size of
+    a local PDF.
+    """
+
+    def __init__(self, path: str = CORPUS_SNAPSHOT_PATH):
+        """
+        Args:
+            path: JSON file the snapshot is stored in.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Source -> {"documents": [[text, metadata], ...], "etag", "last_modified", "content_hash", "mtime", "size", "fetched_at"}
+        self.sources: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        """Load the snapshot from disk."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.sources = json.load(file).get("sources", {})
+        except Exception as e:
+            print(f"Error loading corpus snapshot: {e}")
+
+    def save(self):
+        """Persist the snapshot to disk atomically."""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as file:
+                    json.dump({"sources": self.sources}, file)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving corpus snapshot: {e}")
+
+    def documents(self, source: str) -> Optional[List[List]]:
+        """Return the snapshot chunks of a source as ``[text, metadata]`` pairs, or None if absent."""
+        entry = self.sources.get(source)
+        return entry["documents"] if entry else None
+
+    def store(self, source: str, documents: List[List], validators: Optional[Dict] = None):
+        """
+        Record the chunks of a source and the validators it was fetched with.
+
+        Args:
+            source: PDF path or URL.
+            documents: ``[text, metadata]`` pairs.
+            validators: Freshness validators from ``check_source``; computed for local files when omitted.
+        """
+        if validators is None:
+            validators = file_validators(source) if not is_url(source) else {}
+        with self._lock:
+            self.sources[source] = {**validators, "documents": documents, "fetched_at": time.time()}
+
+    def check_source(self, source: str, timeout: float = CORPUS_CHECK_TIMEOUT) -> Optional[Tuple[Dict, Optional[str]]]:
+        """
+        Check whether a source changed since it was snapshotted.
+
+        URLs are fetched with ``If-None-Match`` / ``If-Modified-Since``; a 304, or a
+        body with the same hash as last time, counts as unchanged. A changed body is
+        returned so the caller parses exactly the content whose hash is recorded,
+        instead of fetching it a second time.
+
+        Args:
+            source: PDF path or URL.
+            timeout: Seconds allowed for the request.
+
+        Returns:
+            None if the source is unchanged, otherwise its new validators (to pass to
+            ``store``) and, for URLs, the decoded body.
+        """
+        entry = self.sources.get(source, {})
+        if not is_url(source):
+            validators = file_validators(source)
+            unchanged = entry and validators and all(entry.get(key) == value for key, value in validators.items())
+            return None if unchanged else (validators, None)
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            with urllib.request.urlopen(urllib.request.Request(source, headers=headers), timeout=timeout) as response:
+                body = response.read()
+                charset = response.headers.get_content_charset() or "utf-8"
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "content_hash": hashlib.sha256(body).hexdigest()
+                }
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+
+        if entry and entry.get("content_hash") == validators["content_hash"]:
+            # Same body without working validators; remember the new ones anyway
+            with self._lock:
+                entry.update(validators)
+            return None
+        return validators, body.decode(charset, errors="replace")
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def file_validators(path: str) -> Dict:
+    """Modification time and size of a local file, or an empty dict if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+    return {"mtime": stat.st_mtime, "size": stat.st_size}
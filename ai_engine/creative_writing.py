@@ -1,10 +1,15 @@
 import os
+import sys
+import asyncio
 from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 import google.generativeai as genai
-from langchain_community.document_loaders import PyPDFLoader
 import json
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import llm_client
+
 # Initialize environment
 load_dotenv()
 
@@ -52,14 +57,15 @@ class InteractiveCreativeWriting:
         if not self.creative_chat or not self.evaluation_model:
             raise RuntimeError("Failed to initialize AI models")
 
-    def get_writing_prompt(self) -> Tuple[str, str]:
+    async def get_writing_prompt(self) -> Tuple[str, str]:
         """
         Generate a creative writing prompt and evaluation criteria.
         Returns tuple of (prompt, criteria)
         """
         try:
             # Generate the creative writing prompt
-            prompt_response = self.creative_chat.send_message(
+            prompt_response = await llm_client.send_message(
+                self.creative_chat,
                 "Generate two sections:\n\n"
                 "SECTION 1 - CREATIVE PROMPT:\n"
                 "Create an engaging Web3/Blockchain/Tech-focused writing prompt that includes:\n"
@@ -93,7 +99,7 @@ class InteractiveCreativeWriting:
             print(f"Error generating prompt: {e}")
             return "Write about blockchain technology's future.", "Evaluate based on creativity and technical accuracy."
 
-    def evaluate_submission(self, submission: str) -> str:
+    async def evaluate_submission(self, submission: str) -> str:
         """
         Evaluate a user's creative writing submission based on the current prompt and criteria.
         Returns detailed feedback.
@@ -114,14 +120,14 @@ class InteractiveCreativeWriting:
                 f"4. Constructive suggestions for improvement"
             )
             
-            response = self.evaluation_model.generate_content(evaluation_prompt)
+            response = await llm_client.generate_content(self.evaluation_model, evaluation_prompt)
             return response.text
             
         except Exception as e:
             print(f"Error evaluating submission: {e}")
             return "Unable to generate evaluation. Please try again."
 
-    def get_json_scores(self, feedback: str) -> str:
+    async def get_json_scores(self, feedback: str) -> str:
         """
         Convert evaluation feedback into a structured JSON format.
         """
@@ -137,7 +143,8 @@ class InteractiveCreativeWriting:
                 f"Feedback to convert:\n{feedback}"
             )
             
-            response = self.evaluation_model.generate_content(
+            response = await llm_client.generate_content(
+                self.evaluation_model,
                 json_prompt,
                 generation_config={"response_mime_type": "application/json"}
             )
@@ -153,6 +160,8 @@ class InteractiveCreativeWriting:
     def extract_text_from_pdf(self, pdf_path: str) -> Optional[str]:
         """Extract text content from a PDF file."""
         try:
+            # Imported on first use; most sessions never load a PDF
+            from langchain_community.document_loaders import PyPDFLoader
             loader = PyPDFLoader(pdf_path)
             documents = loader.load()
             return "\n".join([doc.page_content for doc in documents])
@@ -170,7 +179,7 @@ def run_interactive_session():
             print("\n=== 🌟 Web3 Creativity Quest 🌟 ===\n")
             
             # Get and display prompt and criteria
-            prompt, criteria = system.get_writing_prompt()
+            prompt, criteria = asyncio.run(system.get_writing_prompt())
             print("=== Writing Prompt ===")
             print(prompt)
             print("\n=== Evaluation Criteria ===")
@@ -197,13 +206,13 @@ def run_interactive_session():
             
             # Evaluate submission
             print("\n📝 Evaluating your submission...\n")
-            feedback = system.evaluate_submission(submission)
+            feedback = asyncio.run(system.evaluate_submission(submission))
             print("\n=== 💫 Evaluation Feedback 💫 ===")
             print(feedback)
             
             # Generate JSON scores
             print("\n=== 📊 Detailed Scores 📊 ===")
-            json_scores = system.get_json_scores(feedback)
+            json_scores = asyncio.run(system.get_json_scores(feedback))
             print(json_scores)
             
             # Ask to continue
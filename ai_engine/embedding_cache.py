@@ -0,0 +1,131 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Base path of the on-disk embedding cache (<path>.npy holds vectors, <path>.keys their hashes)
+EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', os.path.join('cache', 'embeddings'))
+
+
+class EmbeddingCache:
+    """
+    Persistent map from document content hash to embedding vector.
+
+    Vectors are stored as one float32 matrix in a ``.npy`` file that is memory-mapped
+    on load, so opening a large cache costs almost nothing and rows are only paged
+    in when used. A sidecar ``.keys`` file lists the hash of each row, in order,
+    after a header line naming the embedding model; a cache written by another
+    model is ignored.
+    """
+
+    def __init__(self, model_name: str, path: str = EMBEDDING_CACHE_PATH):
+        """
+        Args:
+            model_name: Embedding model the vectors come from.
+            path: Base path of the cache files, without extension.
+        """
+        self.model_name = model_name
+        self.path = path
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._pending: Dict[str, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    @property
+    def _vectors_path(self) -> str:
+        return self.path + '.npy'
+
+    @property
+    def _keys_path(self) -> str:
+        return self.path + '.keys'
+
+    def load(self):
+        """Memory-map the cache from disk, starting empty if it is missing or from another model."""
+        try:
+            with open(self._keys_path, 'r', encoding='utf-8') as file:
+                lines = file.read().splitlines()
+            if not lines or lines[0] != self.model_name:
+                return
+            vectors = np.load(self._vectors_path, mmap_mode='r')
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error loading embedding cache: {e}")
+            return
+
+        keys = lines[1:len(vectors) + 1]
+        self._vectors = vectors
+        self._rows = {key: row for row, key in enumerate(keys)}
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached vector for a content hash, or None."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+        row = self._rows.get(key)
+        return None if row is None else self._vectors[row]
+
+    def put(self, key: str, vector: Sequence[float]):
+        """Add a vector; it is written to disk on the next ``save``."""
+        with self._lock:
+            self._pending[key] = np.asarray(vector, dtype=np.float32)
+
+    def embed(self, keys: Sequence[str], texts: Sequence[str], embed_texts: Callable[[List[str]], List[List[float]]]) -> List[np.ndarray]:
+        """
+        Return embeddings for ``texts``, calling ``embed_texts`` only for hashes not in the cache.
+
+        Args:
+            keys: Content hash of each text.
+            texts: Texts to embed.
+            embed_texts: Embeds a batch of texts (e.g. ``embeddings.embed_documents``).
+
+        Returns:
+            One vector per text, in order.
+        """
+        vectors = [self.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            embedded = embed_texts([texts[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                self.put(keys[i], vector)
+                vectors[i] = self._pending[keys[i]]
+        return vectors
+
+    def save(self):
+        """Append pending vectors to the cache files, replacing them atomically."""
+        with self._lock:
+            pending = {key: vector for key, vector in self._pending.items() if key not in self._rows}
+            self._pending.clear()
+            if not pending:
+                return
+            keys = list(self._rows) + list(pending)
+            new_rows = np.stack(list(pending.values()))
+            vectors = new_rows if self._vectors is None or not len(self._rows) else np.concatenate(
+                [np.asarray(self._vectors[:len(self._rows)]), new_rows]
+            )
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self._vectors_path + '.tmp', 'wb') as file:
+                np.save(file, vectors)
+            with open(self._keys_path + '.tmp', 'w', encoding='utf-8') as file:
+                file.write('\n'.join([self.model_name, *keys]))
+            # Vectors first: a keys file never lists more rows than the vectors file holds
+            os.replace(self._vectors_path + '.tmp', self._vectors_path)
+            os.replace(self._keys_path + '.tmp', self._keys_path)
+            self.load()
+
+    def stats(self) -> Dict:
+        """Return size and hit/miss counters."""
+        return {
+            "size": len(self._rows) + len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -1,9 +1,15 @@
 import os
+import sys
+import asyncio
 from typing import Dict, List
 from dotenv import load_dotenv
 import google.generativeai as genai
 import random
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import llm_client
+
 # Initialize environment
 load_dotenv()
 
@@ -126,7 +132,7 @@ class BNBFunFacts:
             subcategory = random.choice(self.main_categories[category])
             return f"{category}: {subcategory}"
 
-    def generate_fun_facts(self, topic: str = None) -> Dict:
+    async def generate_fun_facts(self, topic: str = None) -> Dict:
         """Generate fun facts about the BNB blockchain ecosystem"""
         if not fun_facts_model:
             return {
@@ -144,7 +150,7 @@ class BNBFunFacts:
             Focus on unique, lesser-known, but accurate information.
             If possible, include comparisons with other blockchain ecosystems or real-world analogies."""
             
-            response = fun_facts_chat.send_message(prompt_text)
+            response = await llm_client.send_message(fun_facts_chat, prompt_text)
             
             return {
                 "success": True,
@@ -163,7 +169,7 @@ def main():
     
     while True:
         print("\nGenerating random fun facts...")
-        result = fun_facts.generate_fun_facts()
+        result = asyncio.run(fun_facts.generate_fun_facts())
         
         if "error" in result:
             print(f"\nError: {result['error']}")
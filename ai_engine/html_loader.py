@@ -0,0 +1,254 @@
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# Target size of each chunk in characters, and characters repeated between consecutive chunks of one section
+HTML_CHUNK_SIZE = int(os.getenv('HTML_CHUNK_SIZE', '1000'))
+HTML_CHUNK_OVERLAP = int(os.getenv('HTML_CHUNK_OVERLAP', '100'))
+
+# Elements whose content is never page text (navigation, chrome, scripts)
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "aside", "form", "button", "iframe"}
+
+# Page chrome only at page level: inside these, a header or footer belongs to the content
+# (an article's title heading, a section's footnotes)
+_CHROME_TAGS = {"header", "footer"}
+_CONTENT_TAGS = {"article", "main", "section"}
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th",
+    "pre", "blockquote", "figure", "figcaption", "br", "hr", "details", "summary",
+    "h1", "h2", "h3", "h4", "h5", "h6"
+}
+_HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+class HTMLTextParser(HTMLParser):
+    """
+    Event-driven HTML-to-text parser.
+
+    Keeps only the text of content blocks as a list of ``(kind, text)`` pairs,
+    kind being ``"heading"`` or ``"text"``. Navigation, scripts and page-level
+    headers and footers are skipped, while headers and footers inside an
+    article, main or section are kept. No DOM is built, so memory stays
+    proportional to the extracted text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[Tuple[str, str]] = []
+        self.title = ""
+        self._buffer: List[str] = []
+        self._skip_depth = 0
+        self._content_depth = 0
+        self._chrome: List[bool] = []
+        self._in_title = False
+        self._in_pre = 0
+        self._heading = False
+
+    def _flush(self):
+        text = "".join(self._buffer)
+        self._buffer = []
+        text = text.strip("\n") if self._in_pre else " ".join(text.split())
+        if text:
+            self.blocks.append(("heading" if self._heading else "text", text))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _CONTENT_TAGS:
+            self._content_depth += 1
+        if tag in _CHROME_TAGS:
+            # Remember whether this header/footer was skipped, to undo it at its end tag
+            skipped = not self._content_depth
+            self._chrome.append(skipped)
+            if skipped:
+                self._skip_depth += 1
+            else:
+                self._flush()
+        elif tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            self._heading = tag in _HEADING_TAGS
+            if tag == "pre":
+                self._in_pre += 1
+
+    def handle_endtag(self, tag):
+        if tag in _CONTENT_TAGS:
+            self._content_depth = max(0, self._content_depth - 1)
+        if tag in _CHROME_TAGS:
+            if self._chrome and self._chrome.pop():
+                self._skip_depth = max(0, self._skip_depth - 1)
+            else:
+                self._flush()
+        elif tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            self._heading = False
+            if tag == "pre":
+                self._in_pre = max(0, self._in_pre - 1)
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self._buffer.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+        self.title = " ".join(self.title.split())
+
+
+def _split_long(text: str, size: int) -> List[str]:
+    """Split a paragraph longer than ``size`` at sentence, then word, boundaries."""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > size:
+            cut = sentence.rfind(" ", 0, size)
+            cut = cut if cut > 0 else size
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > size:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_blocks(blocks: List[Tuple[str, str]], chunk_size: int = HTML_CHUNK_SIZE,
+                 chunk_overlap: int = HTML_CHUNK_OVERLAP) -> List[Tuple[str, str]]:
+    """
+    Group parsed blocks into chunks of about ``chunk_size`` characters.
+
+    Every heading starts a new chunk, so a chunk never mixes sections. Within a
+    section, consecutive chunks share up to ``chunk_overlap`` trailing characters.
+
+    Args:
+        blocks: ``(kind, text)`` pairs from ``HTMLTextParser``.
+        chunk_size: Target chunk length in characters.
+        chunk_overlap: Characters carried over between chunks of one section.
+
+    Returns:
+        ``(section heading, chunk text)`` pairs.
+    """
+    chunks = []
+    section, current = "", []
+
+    def emit(carry_over: bool):
+        nonlocal current
+        text = "\n".join(current).strip()
+        if text:
+            chunks.append((section, text))
+        current = []
+        if carry_over and chunk_overlap > 0 and text:
+            # Start the overlap at a sentence boundary if there is one, else at a word boundary
+            tail = text[-chunk_overlap:]
+            boundary = _SENTENCE_END.search(tail) or re.search(r"\s", tail)
+            current = [tail[boundary.end():] if boundary and boundary.end() < len(tail) else tail]
+
+    for kind, text in blocks:
+        if kind == "heading":
+            emit(carry_over=False)
+            section = text
+            current = [text]
+            continue
+        for piece in _split_long(text, chunk_size) if len(text) > chunk_size else [text]:
+            if current and len("\n".join(current)) + 1 + len(piece) > chunk_size:
+                emit(carry_over=True)
+            current.append(piece)
+    emit(carry_over=False)
+    return chunks
+
+
+def parse_html(html: str, source: str = "") -> List[Document]:
+    """
+    Parse a web page and return its text as chunked Documents.
+
+    Ingestion passes the body already fetched by the corpus freshness check.
+
+    Args:
+        html: The decoded page.
+        source: Page URL, recorded in the metadata.
+
+    Returns:
+        Documents with ``source``, ``title`` and ``section`` metadata.
+    """
+    parser = HTMLTextParser()
+    parser.feed(html)
+    parser.close()
+    return _to_documents(parser, source)
+
+
+def _to_documents(parser: HTMLTextParser, source: str) -> List[Document]:
+    return [
+        Document(page_content=text, metadata={"source": source, "title": parser.title, "section": section})
+        for section, text in split_blocks(parser.blocks)
+    ]
+
+
+def _measure(statement: str) -> Optional[Dict]:
+    """Import time and resident memory growth of running ``statement`` in a fresh interpreter."""
+    import sys
+    import json
+    import subprocess
+
+    # Resident memory from /proc (Linux); ru_maxrss would include the parent's peak, inherited across exec
+    script = (
+        "import json, time\n"
+        "def rss():\n"
+        "    with open('/proc/self/status') as status:\n"
+        "        return int(status.read().split('VmRSS:')[1].split()[0]) / 1024\n"
+        "base = rss()\n"
+        "started = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(json.dumps({'seconds': time.perf_counter() - started, 'rss_mb': rss() - base}))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=root)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Compare import time and memory of the lean and unstructured HTML loaders, and load any URLs given."""
+    import sys
+    import time
+    import urllib.request
+
+    loaders = {
+        "lean": "from ai_engine.html_loader import parse_html",
+        "unstructured": "from langchain_unstructured import UnstructuredLoader; import unstructured.partition.html"
+    }
+    for name, statement in loaders.items():
+        measured = _measure(statement)
+        if measured is None:
+            print(f"{name:>12}: not installed")
+        else:
+            print(f"{name:>12}: import {measured['seconds'] * 1000:8.1f} ms, +{measured['rss_mb']:6.1f} MB resident")
+
+    for url in sys.argv[1:]:
+        started = time.perf_counter()
+        request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0 (compatible; QuestBot)"})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            body = response.read().decode(response.headers.get_content_charset() or "utf-8", errors="replace")
+        documents = parse_html(body, url)
+        print(f"{url}: {len(documents)} chunks, {sum(len(doc.page_content) for doc in documents)} characters "
+              f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
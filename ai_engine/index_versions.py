@@ -0,0 +1,210 @@
+import os
+import json
+import time
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Where the record of built index versions, and which one is served, is kept
+INDEX_VERSIONS_PATH = os.getenv('INDEX_VERSIONS_PATH', os.path.join('cache', 'index_versions.json'))
+
+# Built versions kept (the served one included); older ones are deleted once out of service for the grace period
+INDEX_KEEP_VERSIONS = int(os.getenv('INDEX_KEEP_VERSIONS', '2'))
+
+# Seconds a version stays available after it stops being served, so workers still on it can poll and switch
+INDEX_RETIRE_GRACE = float(os.getenv('INDEX_RETIRE_GRACE', '3600'))
+
+
+class FileLock:
+    """
+    Exclusive lock on a file, shared by every process on the host.
+
+    Uses ``flock`` (or ``msvcrt.locking`` on Windows); the OS releases it if
+    the holder dies.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Lock file, created if missing.
+        """
+        self.path = path
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Take the lock; a no-op if this object already holds it.
+
+        Args:
+            blocking: Wait for the lock instead of giving up when another holder has it.
+
+        Returns:
+            Whether the lock is held.
+        """
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        file = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            file.close()
+            if blocking:
+                raise
+            return False
+        self._file = file
+        return True
+
+    def release(self):
+        """Release the lock if held."""
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class IndexVersions:
+    """
+    Record of the vector index versions built by ingestion.
+
+    Each build writes to its own version (a Pinecone namespace or a local store
+    path), so the version being served is never modified. Publishing a build
+    rewrites this record atomically, which is the swap: servers attach to
+    ``current`` and never see a half-built index, and poll ``modified`` to pick
+    up new versions. Changes to the record are made under a lock file shared by
+    every process, and builds take a separate lock so only one runs at a time.
+    A version is deleted only once it has been out of service for
+    INDEX_RETIRE_GRACE seconds.
+    """
+
+    def __init__(self, path: str = INDEX_VERSIONS_PATH):
+        """
+        Args:
+            path: JSON file the record is stored in.
+        """
+        self.path = path
+        self.current: Optional[str] = None
+        # Version -> {"built_at", "chunks", ...}, oldest first
+        self.versions: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        """Load the record from disk."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            self.current = saved.get("current")
+            self.versions = saved.get("versions", {})
+        except Exception as e:
+            print(f"Error loading index versions: {e}")
+
+    def save(self):
+        """Persist the record to disk atomically."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({"current": self.current, "versions": self.versions}, file)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def new_version() -> str:
+        """Name for a new build, sortable by build time."""
+        now = time.time()
+        return time.strftime("v%Y%m%d-%H%M%S", time.gmtime(now)) + f"{int(now * 1000) % 1000:03d}"
+
+    def modified(self) -> Optional[int]:
+        """Modification time of the record in nanoseconds, or None if nothing was published yet."""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def lock(self) -> FileLock:
+        """Lock held while the record is read, changed and saved."""
+        return FileLock(f"{self.path}.lock")
+
+    def build_lock(self) -> FileLock:
+        """Lock held for a whole build, so builds from the CLI and the workers never overlap."""
+        return FileLock(f"{self.path}.build.lock")
+
+    def refresh_lock(self) -> FileLock:
+        """Lock held by the one worker that refreshes the corpus in the background."""
+        return FileLock(f"{self.path}.refresh.lock")
+
+    def publish(self, version: str, info: Dict):
+        """
+        Make a finished build the served version.
+
+        Args:
+            version: The version just built.
+            info: Build details recorded with it (chunk counts etc.).
+        """
+        with self.lock():
+            self.load()
+            now = time.time()
+            if self.current in self.versions:
+                self.versions[self.current]["retired_at"] = now
+            self.versions[version] = {**info, "built_at": now}
+            self.current = version
+            self.save()
+
+    def retire_expired(self, keep: int = INDEX_KEEP_VERSIONS, grace: float = INDEX_RETIRE_GRACE) -> List[str]:
+        """
+        Remove versions past their grace period from the record.
+
+        Args:
+            keep: Newest versions always kept, the served one included.
+            grace: Seconds a version must have been out of service before it is removed.
+
+        Returns:
+            Versions removed, whose vectors and manifests should now be deleted.
+        """
+        with self.lock():
+            self.load()
+            now = time.time()
+            candidates = [version for version in list(self.versions)[:-keep or None] if version != self.current]
+            expired = []
+            for version in candidates:
+                info = self.versions[version]
+                # Versions retired before retirement times were recorded start their grace period now
+                info.setdefault("retired_at", now)
+                if now - info["retired_at"] >= grace:
+                    expired.append(version)
+                    del self.versions[version]
+            if candidates:
+                self.save()
+            return expired
+
+    def stats(self) -> Dict:
+        return {"current": self.current, "versions": list(self.versions)}
+
+
+def versioned_path(path: str, version: str) -> str:
+    """Insert a version into a file path, before its extension (``cache/x.json`` -> ``cache/x-v1.json``)."""
+    root, extension = os.path.splitext(path)
+    return f"{root}-{version}{extension}"
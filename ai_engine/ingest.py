@@ -0,0 +1,50 @@
+import os
+import sys
+import json
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.rag import ConversationalModel, PDF_PATHS, URLS
+
+
+def main(argv=None) -> int:
+    """
+    Load every source, build a new index version if the corpus changed and publish it.
+
+    Run before starting the API, or from a scheduler, so web startup only attaches
+    to the published version and never waits for ingestion. Waits for any build
+    already running in a worker, and afterwards deletes versions whose grace
+    period is over. Workers switch to the new version on their next poll.
+
+    Returns:
+        Process exit code.
+    """
+    parser = argparse.ArgumentParser(description="Build and publish a new RAG index version.")
+    parser.add_argument("--force", action="store_true",
+                        help="build a new version even if the corpus is unchanged or a source failed to load")
+    args = parser.parse_args(argv)
+
+    model = ConversationalModel(pdf_paths=PDF_PATHS, urls=URLS)
+    with model.versions.build_lock():
+        model.versions.load()
+        previous = model.versions.current
+        try:
+            documents = model.load_documents(refresh=True)
+            model.build_index(documents, force=args.force)
+        except Exception as e:
+            print(f"Ingestion failed: {e}")
+            return 1
+        deleted = model.drop_retired_versions()
+
+    print(json.dumps({
+        "previous_version": previous,
+        **model.ingest_stats,
+        "deleted_versions": deleted,
+        "sources": model.load_report
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
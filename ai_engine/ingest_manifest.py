@@ -0,0 +1,66 @@
+import os
+import json
+from typing import Dict, List, Tuple
+
+# Where the record of indexed chunk hashes is kept
+INGEST_MANIFEST_PATH = os.getenv('INGEST_MANIFEST_PATH', os.path.join('cache', 'ingest_manifest.json'))
+
+
+class IngestManifest:
+    """
+    Record of which chunks are in a vector index, keyed by content hash.
+
+    The content hash doubles as the vector id, so comparing the manifest of the
+    served version with the hashes of a fresh load tells ingestion whether a new
+    version is needed and which chunks it adds and removes, without querying the index.
+    """
+
+    def __init__(self, index_name: str, path: str = INGEST_MANIFEST_PATH):
+        """
+        Args:
+            index_name: Vector index the manifest describes; a manifest for another index is ignored.
+            path: JSON file the manifest is stored in.
+        """
+        self.index_name = index_name
+        self.path = path
+        # Content hash -> source (PDF path or URL) of every indexed chunk
+        self.chunks: Dict[str, str] = {}
+        self.load()
+
+    def load(self):
+        """Load the manifest from disk."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            if saved.get("index") == self.index_name:
+                self.chunks = saved.get("chunks", {})
+        except Exception as e:
+            print(f"Error loading ingest manifest: {e}")
+
+    def save(self):
+        """Persist the manifest to disk atomically."""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({"index": self.index_name, "chunks": self.chunks}, file)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving ingest manifest: {e}")
+
+    def diff(self, current: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Compare the indexed chunks with a fresh load.
+
+        Args:
+            current: Content hash -> source of every chunk just loaded.
+
+        Returns:
+            Tuple of (hashes to add, hashes unchanged, hashes to remove).
+        """
+        added = [chunk for chunk in current if chunk not in self.chunks]
+        unchanged = [chunk for chunk in current if chunk in self.chunks]
+        removed = [chunk for chunk in self.chunks if chunk not in current]
+        return added, unchanged, removed
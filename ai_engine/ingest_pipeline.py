@@ -0,0 +1,160 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Chunks sent to the embedding model per request
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '100'))
+
+# Embedding and upsert requests in flight at once
+EMBED_WORKERS = int(os.getenv('EMBED_WORKERS', '4'))
+UPSERT_WORKERS = int(os.getenv('UPSERT_WORKERS', '4'))
+
+# Attempts per request on rate limits and transient errors, and the first backoff in seconds
+INGEST_MAX_ATTEMPTS = int(os.getenv('INGEST_MAX_ATTEMPTS', '6'))
+INGEST_RETRY_BACKOFF = float(os.getenv('INGEST_RETRY_BACKOFF', '1.0'))
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError"}
+_RETRYABLE_TEXT = ("429", "rate limit", "quota", "resource exhausted", "temporarily unavailable", "timed out", "timeout")
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an embedding or upsert error is a rate limit or transient failure worth retrying."""
+    status = getattr(error, "status", None) or getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in _RETRYABLE_STATUS:
+        return True
+    if type(error).__name__ in _RETRYABLE_NAMES or isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in _RETRYABLE_TEXT)
+
+
+class IngestPipeline:
+    """
+    Embeds chunks and upserts their vectors in fixed-size batches, concurrently.
+
+    Up to ``embed_workers`` embedding requests and ``upsert_workers`` upsert
+    requests run at once. Embedding never runs more than that many batches ahead
+    of the upserts, so memory stays bounded however large the corpus is. Rate
+    limits and transient errors are retried with jittered exponential backoff;
+    throughput is then bounded by the quota rather than by round trips.
+    """
+
+    def __init__(self, embed_batch_size: int = EMBED_BATCH_SIZE, upsert_batch_size: int = 100,
+                 embed_workers: int = EMBED_WORKERS, upsert_workers: int = UPSERT_WORKERS,
+                 max_attempts: int = INGEST_MAX_ATTEMPTS, retry_backoff: float = INGEST_RETRY_BACKOFF):
+        """
+        Args:
+            embed_batch_size: Chunks per embedding request.
+            upsert_batch_size: Vectors per upsert request.
+            embed_workers: Embedding requests in flight at once.
+            upsert_workers: Upsert requests in flight at once.
+            max_attempts: Attempts per request before giving up.
+            retry_backoff: Seconds before the first retry; doubled on each further one.
+        """
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.upsert_batch_size = max(1, upsert_batch_size)
+        self.embed_workers = max(1, embed_workers)
+        self.upsert_workers = max(1, upsert_workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.embedded = 0
+
+    def _with_retries(self, function: Callable, *args, **kwargs):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                delay = min(60.0, self.retry_backoff * 2 ** (attempt - 1)) * (0.5 + random.random())
+                print(f"Retrying after {type(e).__name__} (attempt {attempt}/{self.max_attempts}) in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def run(self, keys: Sequence[str], texts: Sequence[str], embedding_cache, embed_texts: Callable[[List[str]], List[List[float]]],
+            make_record: Callable[[str, object], Dict], upsert: Callable[[List[Dict]], None],
+            on_upserted: Optional[Callable[[List[str]], None]] = None) -> Dict:
+        """
+        Embed and upsert chunks.
+
+        Args:
+            keys: Content hash of each chunk (also its vector id).
+            texts: Chunk texts, aligned with ``keys``.
+            embedding_cache: ``EmbeddingCache``; only chunks missing from it are embedded.
+            embed_texts: Embeds a batch of texts (e.g. ``embeddings.embed_documents``).
+            make_record: Builds the upsert record of a chunk from its hash and vector.
+            upsert: Sends one batch of records to the index.
+            on_upserted: Called on the calling thread with the hashes of each upserted batch.
+
+        Returns:
+            Counts of chunks, embedded and cached vectors, retries, and throughput.
+        """
+        started = time.monotonic()
+        retries, embedded = self.retries, self.embedded
+
+        def embed_batch(batch_keys, batch_texts):
+            def embed_missing(missing_texts):
+                vectors = self._with_retries(embed_texts, missing_texts)
+                with self._lock:
+                    self.embedded += len(missing_texts)
+                return vectors
+            return embedding_cache.embed(batch_keys, batch_texts, embed_missing)
+
+        def upsert_batch(records):
+            self._with_retries(upsert, records)
+
+        batches = [
+            (list(keys[start:start + self.embed_batch_size]), list(texts[start:start + self.embed_batch_size]))
+            for start in range(0, len(keys), self.embed_batch_size)
+        ]
+        # Batches embedded or being upserted at once; embedding waits for upserts beyond this
+        max_in_flight = self.embed_workers + self.upsert_workers
+        embedding, upserting = {}, {}
+        upserted = 0
+        next_batch = 0
+
+        embed_pool = ThreadPoolExecutor(max_workers=self.embed_workers, thread_name_prefix="ingest-embed")
+        upsert_pool = ThreadPoolExecutor(max_workers=self.upsert_workers, thread_name_prefix="ingest-upsert")
+        try:
+            while next_batch < len(batches) or embedding or upserting:
+                while next_batch < len(batches) and len(embedding) + len(upserting) < max_in_flight:
+                    batch_keys, batch_texts = batches[next_batch]
+                    embedding[embed_pool.submit(embed_batch, batch_keys, batch_texts)] = batch_keys
+                    next_batch += 1
+
+                done, _ = wait([*embedding, *upserting], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in embedding:
+                        batch_keys = embedding.pop(future)
+                        records = [make_record(key, vector) for key, vector in zip(batch_keys, future.result())]
+                        for start in range(0, len(records), self.upsert_batch_size):
+                            chunk = records[start:start + self.upsert_batch_size]
+                            upserting[upsert_pool.submit(upsert_batch, chunk)] = [record["id"] for record in chunk]
+                    else:
+                        batch_keys = upserting.pop(future)
+                        future.result()
+                        upserted += len(batch_keys)
+                        if on_upserted is not None:
+                            on_upserted(batch_keys)
+        finally:
+            # On failure, queued batches are dropped and running requests allowed to finish
+            embed_pool.shutdown(wait=True, cancel_futures=True)
+            upsert_pool.shutdown(wait=True, cancel_futures=True)
+
+        seconds = time.monotonic() - started
+        embedded = self.embedded - embedded
+        return {
+            "chunks": upserted,
+            "embedded": embedded,
+            "cached": len(keys) - embedded,
+            "retries": self.retries - retries,
+            "seconds": round(seconds, 3),
+            "chunks_per_second": round(upserted / seconds, 1) if seconds > 0 else float(upserted)
+        }
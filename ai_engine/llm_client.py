@@ -0,0 +1,139 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Optional
+
+# Upper bound on LLM calls in flight per worker process. The SDK async
+# methods only hold a coroutine per call, so this can be set in the hundreds.
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '256'))
+
+# Threads used for SDK calls that have no async variant (and other blocking work)
+LLM_EXECUTOR_WORKERS = int(os.getenv('LLM_EXECUTOR_WORKERS', '32'))
+
+_executor = ThreadPoolExecutor(
+    max_workers=LLM_EXECUTOR_WORKERS,
+    thread_name_prefix='llm-client'
+)
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+_in_flight = 0
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the concurrency limiter bound to the running event loop."""
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _semaphore_loop = loop
+    return _semaphore
+
+
+async def _limited(awaitable_factory: Callable[[], Any]) -> Any:
+    """Await a call while holding a slot of the shared concurrency limit."""
+    global _in_flight
+    async with _get_semaphore():
+        _in_flight += 1
+        try:
+            return await awaitable_factory()
+        finally:
+            _in_flight -= 1
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking callable on the shared bounded executor.
+
+    Args:
+        func: The blocking callable.
+        *args, **kwargs: Arguments forwarded to ``func``.
+
+    Returns:
+        Whatever ``func`` returns.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await _limited(lambda: loop.run_in_executor(_executor, call))
+
+
+async def generate_content(model, contents, **kwargs):
+    """
+    Async equivalent of ``GenerativeModel.generate_content``.
+
+    Args:
+        model: A ``google.generativeai.GenerativeModel``.
+        contents: The prompt or content list.
+        **kwargs: Extra arguments such as ``generation_config``.
+
+    Returns:
+        The SDK response object.
+    """
+    if hasattr(model, 'generate_content_async'):
+        return await _limited(lambda: model.generate_content_async(contents, **kwargs))
+    return await run_blocking(model.generate_content, contents, **kwargs)
+
+
+async def send_message(chat, content, **kwargs):
+    """
+    Async equivalent of ``ChatSession.send_message``.
+
+    Args:
+        chat: A ``google.generativeai.ChatSession``.
+        content: The message to send.
+        **kwargs: Extra arguments forwarded to the SDK.
+
+    Returns:
+        The SDK response object.
+    """
+    if hasattr(chat, 'send_message_async'):
+        return await _limited(lambda: chat.send_message_async(content, **kwargs))
+    return await run_blocking(chat.send_message, content, **kwargs)
+
+
+async def ainvoke(runnable, input, **kwargs):
+    """
+    Async equivalent of ``Runnable.invoke`` for LangChain chains and models.
+
+    Args:
+        runnable: Any LangChain runnable.
+        input: The chain input.
+        **kwargs: Extra arguments forwarded to the runnable.
+
+    Returns:
+        The chain output.
+    """
+    if hasattr(runnable, 'ainvoke'):
+        return await _limited(lambda: runnable.ainvoke(input, **kwargs))
+    return await run_blocking(runnable.invoke, input, **kwargs)
+
+
+async def astream(runnable, input, **kwargs) -> AsyncIterator[Any]:
+    """
+    Stream a LangChain runnable's output chunks, holding one concurrency slot until it ends.
+
+    Args:
+        runnable: Any LangChain runnable.
+        input: The chain input.
+        **kwargs: Extra arguments forwarded to the runnable.
+
+    Yields:
+        Output chunks as the runnable produces them.
+    """
+    global _in_flight
+    async with _get_semaphore():
+        _in_flight += 1
+        try:
+            async for chunk in runnable.astream(input, **kwargs):
+                yield chunk
+        finally:
+            _in_flight -= 1
+
+
+def stats() -> dict:
+    """Return the current concurrency usage of the client layer."""
+    return {
+        "in_flight": _in_flight,
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+        "executor_workers": LLM_EXECUTOR_WORKERS
+    }
@@ -1,9 +1,18 @@
 import os
 import re
-from typing import Dict, Optional, List, Set
+import sys
+import asyncio
+from typing import Dict, Optional, List
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import llm_client
+from ai_engine.content_pool import ContentPool
+from ai_engine.text_utils import normalize_text
+from ai_engine.verdict_cache import verdict_cache
+
 # Initialize environment
 load_dotenv()
 
@@ -27,6 +36,9 @@ except Exception as e:
     print(f"Error configuring Google API: {e}")
     genai.configure(api_key='')
 
+# Where the question pool is persisted between restarts
+QUIZ_POOL_PATH = os.getenv('QUIZ_POOL_PATH', os.path.join('cache', 'quiz_pool.json'))
+
 # Generation configurations
 generation_config = {
     "temperature": 0.7,
@@ -58,7 +70,6 @@ try:
         generation_config=generation_config, 
         system_instruction=_load_prompt("quizzes_prompt.txt")
     )
-    quiz_chat = quiz_model.start_chat()
     
     verification_model = genai.GenerativeModel(
         'gemini-1.5-flash', 
@@ -70,19 +81,102 @@ except Exception as e:
     quiz_model = None
     verification_model = None
 
+async def produce_quiz_question(complexity: int) -> Optional[Dict]:
+    """
+    Generate and parse one multiple choice question.
+
+    Args:
+        complexity: Complexity level (1-5).
+
+    Returns:
+        Dict with question, options, hint and answer, or None if parsing failed.
+
+    Raises:
+        Exception: The model call failed (quota, network), so the pool counts it apart from bad output.
+    """
+    if not quiz_model:
+        return None
+
+    prompt_text = f"""Generate a multiple choice question about the BNB Blockchain.
+    Complexity Level: {complexity}
+
+    Format your response EXACTLY like this:
+    Question (Complexity Level {complexity}): [Your question]
+    Options:
+    A) [Option 1]
+    B) [Option 2]
+    C) [Option 3]
+    D) [Option 4]
+    Hint: [Your hint]
+    ANSWER: [Correct option letter]"""
+
+    result = await llm_client.generate_content(quiz_model, prompt_text)
+
+    try:
+        response_text = result.text.strip()
+
+        # Extract components using regex
+        question_pattern = r"Question.*?: (.+?)(?=\nOptions:)"
+        options_pattern = r"Options:\n(A\).+?\nB\).+?\nC\).+?\nD\).+?)(?=\nHint:)"
+        hint_pattern = r"Hint: (.+?)(?=\nANSWER:)"
+        answer_pattern = r"ANSWER: (.+)$"
+
+        question = re.search(question_pattern, response_text, re.DOTALL).group(1).strip()
+        options = re.search(options_pattern, response_text, re.DOTALL).group(1).strip()
+        hint = re.search(hint_pattern, response_text, re.DOTALL).group(1).strip()
+        answer = re.search(answer_pattern, response_text).group(1).strip()
+
+        return {
+            "question": question,
+            "options": [opt.strip() for opt in options.split('\n') if opt.strip()],
+            "hint": hint,
+            "answer": answer
+        }
+    except Exception as e:
+        print(f"Error parsing question: {e}")
+        return None
+
+# Patterns for resolving multiple choice answers locally
+_OPTION_LINE = re.compile(r"^\s*([A-Da-d])\)\s*(.*)$")
+# A letter only counts when ")", ".", "]" or the end follows it: "A decentralized exchange" is text
+_ANSWER_LETTER = re.compile(r"^\W*([A-Da-d])(?=[).\]]|\s*$)")
+_LETTER_CHOICE = re.compile(r"^(?:option|answer)?\s*[\(\[]?([A-Da-d])[\)\].:]?$", re.IGNORECASE)
+
+def _normalize_answer(ans: str) -> str:
+    """Remove punctuation, convert to lowercase, and collapse whitespace."""
+    return " ".join(re.sub(r'[^\w\s]', '', ans).lower().split())
+
+# Pre-generated questions per complexity level, refilled in the background. Each question
+# is generated without chat history, so repeats are dropped by their normalized text.
+question_pool = ContentPool(
+    "quiz",
+    produce_quiz_question,
+    persist_path=QUIZ_POOL_PATH,
+    key=lambda item: normalize_text(item["question"])
+)
+
 class BlockchainQuizGame:
+    # One instance per player session: slots keep idle sessions small
+    __slots__ = (
+        "complexity",
+        "attempts",
+        "current_question",
+        "current_answer",
+        "current_hint",
+        "current_options",
+    )
+
+    max_attempts = 5
+
     def __init__(self):
         self.complexity = 1
         self.attempts = 0
-        self.max_attempts = 5
-        self.current_question_display = None  
         self.current_question = None  
         self.current_answer = None
         self.current_hint = None
-        self.current_options = []
-        self.asked_questions: Set[str] = set()  
+        self.current_options = ()
 
-    def generate_break_options(self) -> str:
+    async def generate_break_options(self) -> str:
         """Generate break options using the AI model."""
         try:
             base_prompt = _load_prompt("quizzes_prompt.txt")
@@ -91,7 +185,7 @@ class BlockchainQuizGame:
             User wants to take a break from the blockchain quiz game. 
             Generate a friendly response suggesting alternative activities using the base prompt: {base_prompt}"""
             
-            result = quiz_model.generate_content(prompt)
+            result = await llm_client.generate_content(quiz_model, prompt)
             return result.text.strip()
         
         except Exception as e:
@@ -103,11 +197,16 @@ class BlockchainQuizGame:
 4. Learn some fun facts or trivia about blockchain and Web3.
 5. Play a short mini-game or puzzle related to blockchain."""
 
-    def verify_answer(self, correct_answer: str, user_answer: str) -> bool:
+    async def verify_answer(self, correct_answer: str, user_answer: str) -> bool:
         """Verify if the user's answer is equivalent to the correct answer"""
         if not verification_model:
             # Fallback to simple comparison if verification model fails
             return self.simple_answer_check(correct_answer, user_answer)
+
+        # Common answers to the same question are judged once and shared across sessions
+        cached = verdict_cache.get(correct_answer, user_answer)
+        if cached is not None:
+            return cached
         
         try:
             # Construct verification prompt
@@ -118,13 +217,15 @@ User Answer: {user_answer}
 Are these answers equivalent?"""
             
             # Generate verification
-            result = verification_model.generate_content(verification_text)
+            result = await llm_client.generate_content(verification_model, verification_text)
             verification = result.text.strip().upper()
             
             print(f"Verification Result: {verification}")  
             
             # Check verification result
-            return 'EQUIVALENT' in verification
+            is_equivalent = 'EQUIVALENT' in verification
+            verdict_cache.put(correct_answer, user_answer, is_equivalent)
+            return is_equivalent
         
         except Exception as e:
             print(f"Verification error: {e}")
@@ -133,13 +234,55 @@ Are these answers equivalent?"""
     
     def simple_answer_check(self, correct_answer: str, user_answer: str) -> bool:
         """Fallback method to check answers if verification fails"""
-        def normalize_answer(ans):
-            # Remove punctuation, convert to lowercase, and strip
-            return re.sub(r'[^\w\s]', '', ans).lower().strip()
-        
-        return normalize_answer(correct_answer) == normalize_answer(user_answer)
+        return _normalize_answer(correct_answer) == _normalize_answer(user_answer)
+
+    def _answer_letter(self) -> Optional[str]:
+        """Option letter of the correct answer, parsed from the ANSWER line."""
+        match = _ANSWER_LETTER.match(self.current_answer or "")
+        return match.group(1).upper() if match else None
+
+    def _option_text(self, letter: Optional[str]) -> Optional[str]:
+        """Text of the option with the given letter, without its "A)" prefix."""
+        for option in self.current_options:
+            match = _OPTION_LINE.match(option)
+            if match and letter and match.group(1).upper() == letter:
+                return match.group(2).strip()
+        return None
+
+    def _resolve_option(self, user_answer: str) -> Optional[str]:
+        """
+        Map a submission to an option letter without calling the LLM.
+
+        Accepts the exact text of an option (with or without its letter prefix), a
+        letter ("b", "B)", "option B") or an option number ("2"). Option text is
+        matched first, so "21" selects the option reading "21" rather than option 21.
 
-    def generate_quiz_question(self) -> Dict:
+        Args:
+            user_answer: The stripped user submission.
+
+        Returns:
+            The selected option letter, or None if the input is free text.
+        """
+        normalized = _normalize_answer(user_answer)
+        for option in self.current_options:
+            match = _OPTION_LINE.match(option)
+            if match and normalized in (_normalize_answer(option), _normalize_answer(match.group(2))):
+                return match.group(1).upper()
+
+        letters = [option[0].upper() for option in self.current_options if _OPTION_LINE.match(option)]
+        if not letters:
+            letters = list("ABCD")
+
+        match = _LETTER_CHOICE.match(user_answer)
+        if match and match.group(1).upper() in letters:
+            return match.group(1).upper()
+
+        if user_answer.isdigit():
+            index = int(user_answer) - 1
+            return letters[index] if 0 <= index < len(letters) else None
+        return None
+
+    async def generate_quiz_question(self) -> Dict:
         """Generate a quiz question with comprehensive error handling"""
         if not quiz_model:
             return {
@@ -150,57 +293,35 @@ Are these answers equivalent?"""
                 "attempts_remaining": self.max_attempts
             }
         
-        try:
-            prompt_text = f"""Generate a multiple choice question about the BNB Blockchain.
-    Complexity Level: {self.complexity}
-
-    Format your response EXACTLY like this:
-    Question (Complexity Level {self.complexity}): [Your question]
-    Options:
-    A) [Option 1]
-    B) [Option 2]
-    C) [Option 3]
-    D) [Option 4]
-    Hint: [Your hint]
-    ANSWER: [Correct option letter]"""
-
-            result = quiz_chat.send_message(prompt_text)
-            response_text = result.text.strip()
-
-            # Extract components using regex
-            question_pattern = r"Question.*?: (.+?)(?=\nOptions:)"
-            options_pattern = r"Options:\n(A\).+?\nB\).+?\nC\).+?\nD\).+?)(?=\nHint:)"
-            hint_pattern = r"Hint: (.+?)(?=\nANSWER:)"
-            answer_pattern = r"ANSWER: (.+)$"
-
-            question = re.search(question_pattern, response_text, re.DOTALL).group(1).strip()
-            options = re.search(options_pattern, response_text, re.DOTALL).group(1).strip()
-            hint = re.search(hint_pattern, response_text, re.DOTALL).group(1).strip()
-            answer = re.search(answer_pattern, response_text).group(1).strip()
-
-            self.current_riddle = question
-            self.current_answer = answer
-            self.current_hint = hint
-            self.attempts = 0
+        item = question_pool.take(self.complexity)
+        if item is None:
+            # Pool drained (or cold start): generate inline for this request
+            item = await question_pool.produce(self.complexity)
 
+        if item is None:
             return {
-                "question": f"Question (Complexity Level {self.complexity}): {question}",
-                "options": options,
-                "hint": f"Hint: {hint}",
-                "complexity": self.complexity,
-                "attempts_remaining": self.max_attempts
-            }
-        except Exception as e:
-            print(f"Error generating question: {e}")
-            return {
-                "error": f"Error generating question: {e}",
+                "error": "Error generating question",
                 "question": "Technical difficulty encountered",
                 "hint": "Please try again",
                 "complexity": self.complexity,
                 "attempts_remaining": self.max_attempts
             }
 
-    def check_answer(self, user_answer: str) -> Dict:
+        self.current_question = item["question"]
+        self.current_options = item["options"]
+        self.current_answer = item["answer"]
+        self.current_hint = item["hint"]
+        self.attempts = 0
+
+        return {
+            "question": f"Question (Complexity Level {self.complexity}): {item['question']}",
+            "options": "\n".join(item["options"]),
+            "hint": f"Hint: {item['hint']}",
+            "complexity": self.complexity,
+            "attempts_remaining": self.max_attempts
+        }
+
+    async def check_answer(self, user_answer: str) -> Dict:
         """Check if the provided answer is correct with AI verification"""
         if not self.current_answer:
             return {
@@ -212,26 +333,24 @@ Are these answers equivalent?"""
         user_answer = user_answer.strip()
         self.attempts += 1
         
-        # If options exist, get the selected option's text
-        if self.current_options:
-            try:
-                # Convert numeric input to option text
-                if user_answer.isdigit():
-                    index = int(user_answer) - 1
-                    if 0 <= index < len(self.current_options):
-                        user_answer = self.current_options[index]
-                    else:
-                        return {
-                            "correct": False,
-                            "message": "Invalid option number",
-                            "attempts_remaining": self.max_attempts - self.attempts,
-                            "hint": self.current_hint
-                        }
-            except Exception:
-                pass
-        
-        # Use AI verification
-        is_correct = self.verify_answer(self.current_answer, user_answer)
+        correct_letter = self._answer_letter()
+        selected_letter = self._resolve_option(user_answer)
+
+        # Numbers that are neither an option's text nor a valid option number are rejected outright
+        if selected_letter is None and user_answer.isdigit() and self.current_options:
+            return {
+                "correct": False,
+                "message": "Invalid option number",
+                "attempts_remaining": self.max_attempts - self.attempts,
+                "hint": self.current_hint
+            }
+
+        if correct_letter and selected_letter:
+            # Letter, option number or exact option text: decided locally
+            is_correct = selected_letter == correct_letter
+        else:
+            # Free text: compare against the text of the correct option with AI verification
+            is_correct = await self.verify_answer(self._option_text(correct_letter) or self.current_answer, user_answer)
         
         if is_correct:
             # Correct answer
@@ -264,7 +383,7 @@ def main():
     print("Let's test your blockchain knowledge!")
     
     def play_game():
-        response = game.generate_quiz_question()
+        response = asyncio.run(game.generate_quiz_question())
         if "error" in response:
             print(f"\nError: {response['error']}")
             return False
@@ -283,14 +402,14 @@ def main():
             if user_answer == 'quit':
                 return False
             
-            answer_result = game.check_answer(user_answer)
+            answer_result = asyncio.run(game.check_answer(user_answer))
             print(answer_result['message'])
             
             if answer_result['correct']:
                 # Offer choice after correct answer
                 choice = input("\nOptions:\n1. Continue Quiz\n2. Take a Break\nChoose (1/2): ").strip()
                 if choice == '2':
-                    print(game.generate_break_options())
+                    print(asyncio.run(game.generate_break_options()))
                     return False
                 elif choice == '1':
                     return play_game()
@@ -299,7 +418,7 @@ def main():
                 # Offer choice after failed attempts
                 choice = input("\nOptions:\n1. Try Again\n2. Take a Break\nChoose (1/2): ").strip()
                 if choice == '2':
-                    print(game.generate_break_options())
+                    print(asyncio.run(game.generate_break_options()))
                     return False
                 elif choice == '1':
                     return play_game()
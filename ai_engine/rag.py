@@ -1,44 +1,115 @@
 import os
+import sys
+import io
+import json
+import asyncio
+import time
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from operator import itemgetter
 from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
-from langchain.docstore.document import Document
-from langchain.document_loaders import WebBaseLoader, PyPDFLoader
+from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
-from langchain_pinecone import Pinecone
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.runnables import RunnableParallel
-from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate
-from langchain_unstructured import UnstructuredLoader
-
-from pinecone import Pinecone as pc
-from pinecone import ServerlessSpec
-from markdownify import markdownify as md
+from langchain_core.runnables import RunnableParallel, RunnableLambda
+from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import llm_client
+from ai_engine.chunk_filter import filter_chunks
+from ai_engine.context_packer import RAG_HISTORY_TOKENS, RAG_PROMPT_TOKENS, count_tokens, pack_context
+from ai_engine.corpus_snapshot import CorpusSnapshot
+from ai_engine.embedding_cache import EmbeddingCache
+from ai_engine.html_loader import parse_html
+from ai_engine.index_versions import IndexVersions, versioned_path
+from ai_engine.ingest_manifest import INGEST_MANIFEST_PATH, IngestManifest
+from ai_engine.ingest_pipeline import IngestPipeline
+from ai_engine.retrieval_cache import CachedRetriever, query_embeddings, retrieval_cache
+from ai_engine.semantic_cache import answer_cache
+from ai_engine.vector_store import LOCAL_VECTOR_PATH, LocalVectorStore
 
 # Load environment variables
 load_dotenv()
 os.environ['GOOGLE_API_KEY'] = os.getenv('GOOGLE_API_KEY')
-os.environ['PINECONE_API_KEY'] = os.getenv('PINECONE_API_KEY')
 
-# Initialize Pinecone client
-pine_client = pc(api_key=os.getenv("PINECONE_API_KEY"))
+# Vector backend: "pinecone" (serverless index) or "local" (in-process NumPy store)
+VECTOR_STORE = os.getenv('VECTOR_STORE', 'pinecone').lower()
+
 index_name = "questbot"  
 
-# Check if the index exists or create a new one
-if index_name not in pine_client.list_indexes().names():
-    print("Creating index")
-    pine_client.create_index(
-        name=index_name,
-        metric="cosine",
-        dimension=768,
-        spec=ServerlessSpec(
-            cloud="aws",
-            region="us-east-1"
+# Embedding model for documents and queries; cached vectors are tied to it
+EMBEDDING_MODEL = "models/embedding-001"
+
+# Vectors sent to Pinecone per upsert request
+UPSERT_BATCH_SIZE = int(os.getenv('UPSERT_BATCH_SIZE', '100'))
+
+# Sources (PDFs and URLs) loaded in parallel, and seconds each one may take
+DOCUMENT_LOAD_WORKERS = int(os.getenv('DOCUMENT_LOAD_WORKERS', '8'))
+DOCUMENT_LOAD_TIMEOUT = float(os.getenv('DOCUMENT_LOAD_TIMEOUT', '60'))
+
+# Pinecone queries sent at once when retrieving for a batch of questions
+RAG_BATCH_SEARCH_WORKERS = int(os.getenv('RAG_BATCH_SEARCH_WORKERS', '8'))
+
+# Web page loader: "lean" (built-in streaming HTML parser) or "unstructured" (needs langchain-unstructured)
+HTML_LOADER = os.getenv('HTML_LOADER', 'lean').lower()
+
+# Exchanges (question + answer) of conversation history kept and sent with each query
+RAG_HISTORY_WINDOW = int(os.getenv('RAG_HISTORY_WINDOW', '5'))
+
+# Maximum length in words of the running summary of turns that left the window
+RAG_SUMMARY_WORDS = int(os.getenv('RAG_SUMMARY_WORDS', '150'))
+
+# Characters of each message kept in conversation history; longer ones are truncated (the answer sent is not)
+RAG_MAX_MESSAGE_CHARS = int(os.getenv('RAG_MAX_MESSAGE_CHARS', '4000'))
+
+# Seconds between background checks of the sources for changes (0: only on demand)
+CORPUS_REFRESH_INTERVAL = float(os.getenv('CORPUS_REFRESH_INTERVAL', '0'))
+
+# Seconds between checks for a version published by the ingestion command or another worker (0: never)
+INDEX_POLL_INTERVAL = float(os.getenv('INDEX_POLL_INTERVAL', '30'))
+
+# Documents ingested for the RAG assistant, by the ingestion command and the API
+PDF_PATHS = [
+   # r"C:\Users\Okeoma\Downloads\whitepaper_Prompt Engineering_v4.pdf",
+]
+
+URLS = [
+    "https://questbot.gitbook.io/questbot",
+    "https://questbot.gitbook.io/questbot/introduction-what-is-questbot",
+    "https://questbot.gitbook.io/questbot/why-questbot",
+    "https://questbot.gitbook.io/questbot/core-features",
+    "https://questbot.gitbook.io/questbot/how-questbot-works",
+    "https://questbot.gitbook.io/questbot/integration-details",
+    "https://questbot.gitbook.io/questbot/aligning-with-hackathon-tracks",
+    "https://questbot.gitbook.io/questbot/impact-potential",
+    "https://questbot.gitbook.io/questbot/faqs"
+]
+
+pine_client = None
+if VECTOR_STORE == "pinecone":
+    from pinecone import Pinecone as pc
+    from pinecone import ServerlessSpec
+
+    # Initialize Pinecone client
+    os.environ['PINECONE_API_KEY'] = os.getenv('PINECONE_API_KEY')
+    pine_client = pc(api_key=os.getenv("PINECONE_API_KEY"))
+
+    # Check if the index exists or create a new one
+    if index_name not in pine_client.list_indexes().names():
+        print("Creating index")
+        pine_client.create_index(
+            name=index_name,
+            metric="cosine",
+            dimension=768,
+            spec=ServerlessSpec(
+                cloud="aws",
+                region="us-east-1"
+            )
         )
-    )
-    print(pine_client.describe_index(index_name))
+        print(pine_client.describe_index(index_name))
 
 def _load_prompt(file_name: str) -> str:
     """Load prompt from a file with error handling."""
@@ -56,6 +127,111 @@ def _load_prompt(file_name: str) -> str:
 # Load base system prompt
 system_prompt = _load_prompt(file_name="rag.txt")
 
+# Prompt for folding older turns into a conversation's running summary
+summary_prompt = _load_prompt(file_name="rag_summary.txt")
+
+class ConversationHistory:
+    """
+    Chat history of one conversation.
+
+    Only the last RAG_HISTORY_WINDOW exchanges are kept verbatim. Older messages
+    move to ``unsummarized`` until a background task folds them into ``summary``,
+    so the prompt stays roughly the same size however long the conversation runs.
+    Messages are truncated to RAG_MAX_MESSAGE_CHARS and the summary to about 10
+    characters per RAG_SUMMARY_WORDS word, which bounds the size of one history.
+    """
+
+    __slots__ = ("messages", "summary", "unsummarized", "unsummarized_start")
+
+    # Messages waiting to be summarized beyond this are dropped, oldest first
+    MAX_UNSUMMARIZED = 50
+    MAX_SUMMARY_CHARS = 10 * RAG_SUMMARY_WORDS
+    # Approximate bytes of object overhead per message and per history
+    _MESSAGE_OVERHEAD = 150
+    _HISTORY_OVERHEAD = 300
+
+    def __init__(self):
+        # Lists of [role, content] pairs, role being "human" or "ai"
+        self.messages = []
+        self.summary = ""
+        self.unsummarized = []
+        # Position of unsummarized[0] among all messages that ever left the window
+        self.unsummarized_start = 0
+
+    def _append(self, role: str, content: str):
+        self.messages.append([role, content[:RAG_MAX_MESSAGE_CHARS]])
+        if len(self.messages) > 2 * RAG_HISTORY_WINDOW:
+            overflow = len(self.messages) - 2 * RAG_HISTORY_WINDOW
+            self.unsummarized = (self.unsummarized or []) + self.messages[:overflow]
+            trimmed = max(0, len(self.unsummarized) - self.MAX_UNSUMMARIZED)
+            del self.unsummarized[:trimmed]
+            self.unsummarized_start = (self.unsummarized_start or 0) + trimmed
+            del self.messages[:overflow]
+
+    def add_user_message(self, content: str):
+        self._append("human", content)
+
+    def add_ai_message(self, content: str):
+        self._append("ai", content)
+
+    def pending_summary(self) -> tuple:
+        """
+        Messages waiting to be summarized.
+
+        Returns:
+            Tuple of (the messages, position to pass to ``fold_summary`` once they are summarized).
+        """
+        pending = list(self.unsummarized or [])
+        return pending, (self.unsummarized_start or 0) + len(pending)
+
+    def fold_summary(self, summary: str, folded_until: int):
+        """
+        Replace the summary with one covering the messages returned by ``pending_summary``.
+
+        Messages are forgotten by position, so later ones (even identical) are kept,
+        and those already trimmed since ``pending_summary`` are not counted twice.
+
+        Args:
+            summary: The new summary.
+            folded_until: Position returned by ``pending_summary``.
+        """
+        self.summary = summary[:self.MAX_SUMMARY_CHARS]
+        start = self.unsummarized_start or 0
+        folded = max(0, folded_until - start)
+        self.unsummarized = (self.unsummarized or [])[folded:]
+        self.unsummarized_start = start + folded
+
+    def approximate_size(self) -> int:
+        """Approximate memory held by the history, in bytes."""
+        messages = [*self.messages, *(self.unsummarized or [])]
+        text = len(self.summary or "") + sum(len(content) for _, content in messages)
+        return text + self._MESSAGE_OVERHEAD * len(messages) + self._HISTORY_OVERHEAD
+
+    def format(self, max_tokens: int = RAG_HISTORY_TOKENS) -> str:
+        """
+        Render the history for the prompt's chat_history slot.
+
+        Args:
+            max_tokens: Token budget; the summary comes first, then the most recent messages that fit.
+
+        Returns:
+            The summary of earlier turns, if any, then one "Role: content" line per message, oldest first.
+        """
+        lines, used = [], 0
+        header = f"Summary of earlier conversation: {self.summary}" if self.summary else ""
+        if header:
+            used = count_tokens(header)
+        for role, content in reversed(self.messages):
+            line = f"{role.capitalize()}: {content}"
+            tokens = count_tokens(line)
+            if used + tokens > max_tokens:
+                break
+            lines.append(line)
+            used += tokens
+        if header:
+            lines.append(header)
+        return "\n".join(reversed(lines))
+
 class ConversationalModel:
     def __init__(self, pdf_paths=None, urls=None):
         """
@@ -68,17 +244,22 @@ class ConversationalModel:
         self.pdf_paths = pdf_paths or []
         self.urls = urls or []
         self.vectorstore = None
-        self.embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+        self.embedding_model = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+        self.embedding_cache = EmbeddingCache(EMBEDDING_MODEL)
+        # Index version being served, and its local store when VECTOR_STORE is "local"
+        self.versions = IndexVersions()
+        self.version = None
+        self.local_store = None
+        self.ingest_stats = None
+        self.load_report = {}
+        self.rebuild_status = {"running": False}
+        self.snapshot = CorpusSnapshot()
+        self._ingest_lock = threading.Lock()
+        self._attach_lock = threading.Lock()
+        self._refresh_thread = None
+        self._rebuild_thread = None
+        self._watch_thread = None
         self.chat_model = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0)
-        
-        # Initialize memory
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history", 
-            return_messages=True,
-            human_prefix="Human",
-            ai_prefix="AI",
-            k=5
-        )
 
     def _compute_document_hash(self, document):
         """
@@ -94,95 +275,571 @@ class ConversationalModel:
         hash_content = document.page_content + str(document.metadata)
         return hashlib.md5(hash_content.encode()).hexdigest()
 
-    def load_documents(self):
+    def _load_source(self, source, started):
+        """
+        Load and split one PDF path or URL, unless it is unchanged since the snapshot.
+
+        Args:
+            source (str): PDF path or URL.
+            started (dict): Filled with the source's start time, for its timeout.
+
+        Returns:
+            list: The source's Document objects, or None if the snapshot is still fresh.
+        """
+        started[source] = time.monotonic()
+        checked = self.snapshot.check_source(source)
+        if checked is None:
+            return None
+        # URL bodies come from the freshness check, so what is indexed is what was hashed
+        validators, body = checked
+
+        # Heavy loaders are only imported when a source needs them
+        if source in self.pdf_paths:
+            from langchain_community.document_loaders import PyPDFLoader
+            documents = PyPDFLoader(source).load_and_split()
+        elif HTML_LOADER == "unstructured":
+            from langchain_unstructured import UnstructuredLoader
+            documents = UnstructuredLoader(file=io.BytesIO(body.encode('utf-8')), content_type="text/html").load_and_split()
+        else:
+            documents = parse_html(body, source)
+        for doc in documents:
+            # JSON round-trip so fresh and snapshot chunks hash identically
+            doc.metadata = json.loads(json.dumps({**doc.metadata, "source": source}, default=str))
+
+        self.snapshot.store(source, [[doc.page_content, doc.metadata] for doc in documents], validators)
+        return documents
+
+    def _snapshot_documents(self, source):
+        """Rebuild a source's Document objects from the corpus snapshot, or None if absent."""
+        chunks = self.snapshot.documents(source)
+        if chunks is None:
+            return None
+        return [Document(page_content=text, metadata=metadata) for text, metadata in chunks]
+
+    def load_documents(self, refresh=False):
         """
         Loads documents from PDF files and URLs.
 
+        Sources found in the corpus snapshot are served from it; the rest are
+        deduplicated and loaded on a bounded thread pool. A source that fails or
+        exceeds DOCUMENT_LOAD_TIMEOUT falls back to its snapshot, if any, or is
+        skipped. Outcomes and load times are recorded in ``self.load_report``.
+
+        Args:
+            refresh (bool): Check every source for changes instead of trusting the snapshot.
+
         Returns:
             list: A list of Document objects.
         """
+        sources = list(dict.fromkeys([*self.pdf_paths, *self.urls]))
+        load_report = {}
         documents = []
+        started = {}
 
-        # Load PDFs
-        for pdf_path in self.pdf_paths:
-            pdf_loader = PyPDFLoader(pdf_path)
-            documents.extend(pdf_loader.load_and_split())
+        to_load = []
+        for source in sources:
+            cached = None if refresh else self._snapshot_documents(source)
+            if cached is None:
+                to_load.append(source)
+            else:
+                documents.extend(cached)
+                load_report[source] = {"documents": len(cached), "seconds": 0.0, "snapshot": True}
+
+        def fall_back(source, report):
+            cached = self._snapshot_documents(source)
+            if cached is not None:
+                documents.extend(cached)
+                report["snapshot"] = True
+            load_report[source] = report
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(DOCUMENT_LOAD_WORKERS, len(to_load))))
+        try:
+            pending = {executor.submit(self._load_source, source, started): source for source in to_load}
+            while pending:
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+
+                for future in done:
+                    source = pending.pop(future)
+                    elapsed = round(now - started.get(source, now), 3)
+                    try:
+                        loaded = future.result()
+                    except Exception as e:
+                        print(f"Failed to load {source}: {e}")
+                        fall_back(source, {"error": str(e), "seconds": elapsed})
+                        continue
+                    report = {"seconds": elapsed}
+                    if loaded is None:
+                        loaded = self._snapshot_documents(source)
+                        report["unchanged"] = True
+                    documents.extend(loaded)
+                    load_report[source] = {"documents": len(loaded), **report}
+
+                # Give up on sources that have been loading for too long
+                for future, source in list(pending.items()):
+                    if source in started and now - started[source] > DOCUMENT_LOAD_TIMEOUT:
+                        future.cancel()
+                        del pending[future]
+                        print(f"Timed out loading {source} after {DOCUMENT_LOAD_TIMEOUT}s")
+                        fall_back(source, {"error": "timeout", "seconds": round(now - started[source], 3)})
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if to_load:
+            self.snapshot.save()
+        self.load_report = load_report
+        return documents
 
-        # Load URLs using UnstructuredLoader
-        for url in self.urls:
-            unstructured_loader = UnstructuredLoader(web_url=url)
-            documents.extend(unstructured_loader.load_and_split())
+    def rebuild(self, force=False, on_swap=None):
+        """
+        Re-check every source and, if the corpus changed, build and serve a new index version.
 
-        return documents
+        Nothing is done while another process (the ingestion command or another
+        worker) is building; its version is picked up by ``start_version_watch``.
+
+        Args:
+            force (bool): Build a new version even if nothing changed.
+            on_swap (callable, optional): Called with the new QA chain when the served version changes.
+
+        Returns:
+            dict: Ingestion counts, including the version served afterwards, or None if another process is building.
+        """
+        with self._ingest_lock:
+            build_lock = self.versions.build_lock()
+            if not build_lock.acquire(blocking=False):
+                print("Another process is building the index; not rebuilding.")
+                return None
+            try:
+                self.build_index(self.load_documents(refresh=True), force=force)
+                self.drop_retired_versions()
+            finally:
+                build_lock.release()
+        self._serve_current(on_swap)
+        return self.ingest_stats
+
+    def _serve_current(self, on_swap=None):
+        """Attach to the current version, calling ``on_swap`` with the new QA chain if it changed."""
+        previous = self.version
+        qa_chain = self.attach()
+        if on_swap is not None and qa_chain is not None and self.version != previous:
+            on_swap(qa_chain)
+
+    def start_rebuild(self, force=False, on_swap=None):
+        """
+        Run ``rebuild`` on a daemon thread; progress is kept in ``self.rebuild_status``.
+
+        Returns:
+            bool: False if a rebuild is already running.
+        """
+        if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+            return False
+
+        def rebuild():
+            try:
+                stats = self.rebuild(force=force, on_swap=on_swap)
+                self.rebuild_status.update(running=False, finished_at=time.time(), version=self.version)
+                if stats is None:
+                    self.rebuild_status["skipped"] = "another process is building"
+            except Exception as e:
+                print(f"Error rebuilding index: {e}")
+                self.rebuild_status.update(running=False, finished_at=time.time(), error=str(e))
+
+        self.rebuild_status = {"running": True, "started_at": time.time(), "force": force}
+        self._rebuild_thread = threading.Thread(target=rebuild, name="index-rebuild", daemon=True)
+        self._rebuild_thread.start()
+        return True
+
+    def start_background_refresh(self, on_swap=None):
+        """
+        Rebuild on a daemon thread every CORPUS_REFRESH_INTERVAL seconds, when set.
+
+        Only the worker holding the refresh lock rebuilds, so sources are checked
+        once per interval however many workers run; if it exits, another takes over.
+        """
+        if CORPUS_REFRESH_INTERVAL <= 0:
+            return
+
+        def refresh_loop():
+            refresh_lock = self.versions.refresh_lock()
+            while True:
+                time.sleep(CORPUS_REFRESH_INTERVAL)
+                if not refresh_lock.acquire(blocking=False):
+                    continue
+                try:
+                    self.rebuild(on_swap=on_swap)
+                except Exception as e:
+                    print(f"Error refreshing corpus: {e}")
+
+        self._refresh_thread = threading.Thread(target=refresh_loop, name="corpus-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def start_version_watch(self, on_swap=None):
+        """
+        Check the version record every INDEX_POLL_INTERVAL seconds and serve newly published versions.
+
+        This is how workers switch to versions built by the ingestion command or another worker.
+        """
+        if INDEX_POLL_INTERVAL <= 0:
+            return
+
+        def watch_loop():
+            # Unknown at first, so a version published since startup is attached on the first check
+            modified = None
+            while True:
+                time.sleep(INDEX_POLL_INTERVAL)
+                try:
+                    current = self.versions.modified()
+                    if current != modified:
+                        modified = current
+                        self._serve_current(on_swap)
+                except Exception as e:
+                    print(f"Error checking for a new index version: {e}")
+
+        self._watch_thread = threading.Thread(target=watch_loop, name="index-version-watch", daemon=True)
+        self._watch_thread.start()
 
-    def create_or_update_vectorstore(self, documents):
+    def _manifest(self, version):
+        """Ingestion manifest of an index version."""
+        name = f"{index_name}:{version}" if VECTOR_STORE == "pinecone" else f"local:{index_name}:{version}"
+        return IngestManifest(name, path=versioned_path(INGEST_MANIFEST_PATH, version))
+
+    def create_or_update_vectorstore(self, documents, version):
         """
-        Creates or updates Pinecone vectorstore, avoiding reindexing existing documents.
+        Creates one version of the vectorstore holding every chunk of the documents.
+
+        Each version is a Pinecone namespace, or its own store with the local backend,
+        and is written only while it is built, so it always starts empty. Chunks are
+        identified by their content hash, which is also their vector id. Only chunks
+        missing from the embedding cache are sent to the embedding model, so chunks
+        carried over from the current version are upserted without being re-embedded.
 
         Args:
             documents (list): A list of Document objects.
+            version (str): Index version to write to.
+
+        Returns:
+            dict: Counts of chunks added, unchanged and removed compared with the current version.
         """
-        # Initialize the Pinecone index
-        index = pine_client.Index(index_name)
+        manifest = self._manifest(version)
+        if VECTOR_STORE == "pinecone":
+            # Initialize the Pinecone index; each version lives in its own namespace
+            index = pine_client.Index(index_name)
+            target = {"namespace": version}
+        else:
+            # The local store mirrors Pinecone's upsert calls
+            index = LocalVectorStore(path=versioned_path(LOCAL_VECTOR_PATH, version))
+            target = {}
         
         # Prepare documents for indexing
-        new_documents = []
-        document_hashes = set()
-
+        documents_by_hash = {}
         for doc in documents:
-            # Compute document hash
+            # Compute document hash; identical chunks are indexed once
             doc_hash = self._compute_document_hash(doc)
-            
-            # Check if document is already in the index
-            if doc_hash not in document_hashes:
-                new_documents.append(doc)
-                document_hashes.add(doc_hash)
-
-        # If there are new documents, add them to the vectorstore
-        if new_documents:
-            Pinecone.from_documents(
-                new_documents, 
-                self.embedding_model, 
-                index_name=index_name
+            documents_by_hash.setdefault(doc_hash, doc)
+
+        sources = {doc_hash: str(doc.metadata.get("source", "")) for doc_hash, doc in documents_by_hash.items()}
+        current = self.versions.current
+        previous = self._manifest(current) if current is not None else None
+        added, unchanged, removed = previous.diff(sources) if previous is not None else (list(sources), [], [])
+
+        def make_record(doc_hash, vector):
+            doc = documents_by_hash[doc_hash]
+            return {"id": doc_hash, "values": vector.tolist(), "metadata": {**doc.metadata, "text": doc.page_content}}
+
+        def record_upserted(batch):
+            for doc_hash in batch:
+                manifest.chunks[doc_hash] = sources[doc_hash]
+
+        # Embed and upsert in concurrent batches; only chunks whose hash is not in the embedding cache are embedded
+        try:
+            pipeline_stats = IngestPipeline(upsert_batch_size=UPSERT_BATCH_SIZE).run(
+                list(sources),
+                [doc.page_content for doc in documents_by_hash.values()],
+                self.embedding_cache,
+                self.embedding_model.embed_documents,
+                make_record,
+                lambda batch: index.upsert(vectors=batch, **target),
+                on_upserted=record_upserted
             )
-            print(f"Added {len(new_documents)} new documents to the index.")
+        finally:
+            self.embedding_cache.save()
+        manifest.save()
+        if VECTOR_STORE != "pinecone":
+            index.save()
+
+        print(
+            f"Embedded {pipeline_stats['embedded']} documents, {pipeline_stats['cached']} served from the embedding cache; "
+            f"{pipeline_stats['chunks_per_second']} chunks/s with {pipeline_stats['retries']} retries."
+        )
+        print(f"Ingestion of {version}: {len(added)} added, {len(unchanged)} unchanged, {len(removed)} removed since {current}.")
+        return {"added": len(added), "unchanged": len(unchanged), "removed": len(removed), "pipeline": pipeline_stats}
 
-        # Create vectorstore from the existing index
-        self.vectorstore = Pinecone.from_existing_index(
-            index_name, 
-            self.embedding_model
+    def build_index(self, documents, force=False):
+        """
+        Build a new index version from the documents and publish it as the served version.
+
+        Boilerplate lines shared across sources and near-duplicate chunks are
+        removed first. Nothing is built when the remaining chunks are exactly those
+        of the current version, or when a source failed to load with no snapshot to fall back on
+        (the new version would silently lose its chunks).
+
+        Args:
+            documents (list): A list of Document objects.
+            force (bool): Build even if nothing changed or a source is missing.
+
+        Returns:
+            str: The new version, or None if nothing was built.
+        """
+        self.versions.load()
+        current = self.versions.current
+        documents, filtered = filter_chunks(documents)
+        print(
+            f"Filtered {filtered['chunks_in']} chunks: {filtered['boilerplate_lines_removed']} boilerplate lines stripped, "
+            f"{filtered['dropped_short']} emptied and {filtered['dropped_near_duplicates']} near-duplicate chunks dropped."
         )
+        hashes = {self._compute_document_hash(doc) for doc in documents}
+        missing = [source for source, report in self.load_report.items() if "error" in report and not report.get("snapshot")]
+
+        if not documents and not force:
+            print("No documents loaded; not building an index version.")
+            self.ingest_stats = {"version": current, "built": False, "chunks": 0, "filtered": filtered}
+            return None
+        if current is not None and not force:
+            if missing:
+                print(f"Not building a new index version; failed to load {', '.join(missing)}.")
+                self.ingest_stats = {"version": current, "built": False, "missing_sources": missing, "filtered": filtered}
+                return None
+            if hashes == set(self._manifest(current).chunks):
+                print(f"Corpus unchanged; still serving index version {current}.")
+                self.ingest_stats = {"version": current, "built": False, "chunks": len(hashes), "filtered": filtered}
+                return None
+
+        version = self.versions.new_version()
+        try:
+            stats = self.create_or_update_vectorstore(documents, version)
+        except Exception:
+            # Never published; do not leave a partial version behind
+            self._drop_version(version)
+            raise
+        stats.update(chunks=len(hashes), filtered=filtered)
+        self.versions.publish(version, stats)
+
+        print(f"Published index version {version}.")
+        self.ingest_stats = {"version": version, "built": True, **stats}
+        return version
+
+    def drop_retired_versions(self):
+        """
+        Delete versions that have been out of service for INDEX_RETIRE_GRACE seconds.
+
+        They leave the record before their vectors are deleted, so no worker attaches to them meanwhile.
+
+        Returns:
+            list: The versions deleted.
+        """
+        retired = self.versions.retire_expired()
+        for version in retired:
+            self._drop_version(version)
+            print(f"Deleted retired index version {version}.")
+        return retired
+
+    def _drop_version(self, version):
+        """Delete a retired index version and its manifest."""
+        try:
+            if VECTOR_STORE == "pinecone":
+                pine_client.Index(index_name).delete(delete_all=True, namespace=version)
+            else:
+                path = versioned_path(LOCAL_VECTOR_PATH, version)
+                for file_path in (path + '.npy', path + '.json'):
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+            manifest_path = versioned_path(INGEST_MANIFEST_PATH, version)
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+        except Exception as e:
+            print(f"Error deleting index version {version}: {e}")
+
+    def attach(self):
+        """
+        Serve the current index version, as recorded by the last published build.
+
+        Nothing is loaded or embedded: only the version's vectorstore is opened.
+        When the version changed, cached answers and retrieval results are dropped.
+
+        Returns:
+            Runnable: A QA chain over the current version, or None if none was built yet.
+        """
+        with self._attach_lock:
+            return self._attach()
+
+    def _attach(self):
+        self.versions.load()
+        version = self.versions.current
+        if version is None:
+            return None
+
+        if version != self.version or self.vectorstore is None:
+            if VECTOR_STORE == "local":
+                self.local_store = LocalVectorStore(path=versioned_path(LOCAL_VECTOR_PATH, version))
+                self.vectorstore = self.local_store
+            else:
+                from langchain_pinecone import Pinecone
+                self.vectorstore = Pinecone.from_existing_index(
+                    index_name, 
+                    self.embedding_model,
+                    namespace=version
+                )
+            if self.version is not None:
+                # Cached answers and retrieval results came from the previous corpus
+                answer_cache.invalidate()
+                retrieval_cache.invalidate()
+            self.version = version
+            if self.ingest_stats is None:
+                self.ingest_stats = {"version": version, **self.versions.versions.get(version, {})}
+
+        return self.get_qa_chain()
+
+    def embed_query(self, query):
+        """
+        Embed a question with the same model used for retrieval.
+
+        Embeddings are cached by normalized question, so the semantic cache lookup
+        and the retriever share one embedding call per distinct question.
+
+        Args:
+            query (str): The user's question.
+
+        Returns:
+            list: The query embedding.
+        """
+        vector = query_embeddings.get(query)
+        if vector is None:
+            vector = self.embedding_model.embed_query(query)
+            query_embeddings.put(query, vector)
+        return vector
+
+    def embed_queries(self, queries):
+        """
+        Embed several questions with a single embedding request.
+
+        Questions whose embedding is cached (and repeats within ``queries``) are not sent.
+
+        Args:
+            queries (list): The questions.
+
+        Returns:
+            list: One embedding per question, in order.
+        """
+        vectors = [query_embeddings.get(query) for query in queries]
+        missing = list(dict.fromkeys(query for query, vector in zip(queries, vectors) if vector is None))
+        if missing:
+            embedded = dict(zip(missing, self.embedding_model.embed_documents(missing, task_type="RETRIEVAL_QUERY")))
+            for query, vector in embedded.items():
+                query_embeddings.put(query, vector)
+            vectors = [embedded[query] if vector is None else vector for query, vector in zip(queries, vectors)]
+        return vectors
+
+    def prefetch_retrieval(self, queries, vectors, k=4):
+        """
+        Retrieve the chunks for several questions at once into the retrieval cache.
+
+        The local store searches all query vectors in one matrix product; Pinecone
+        gets one query per question, sent concurrently. The QA chain's retriever
+        then finds every question in the cache.
+
+        Args:
+            queries (list): The questions.
+            vectors (list): Their embeddings, from ``embed_queries``.
+            k (int): Number of chunks per question.
+        """
+        pending = [(query, vector) for query, vector in zip(queries, vectors) if retrieval_cache.get(query) is None]
+        if not pending:
+            return
+        generation = retrieval_cache.generation
+        store = self.vectorstore
+        if self.local_store is not None:
+            results = store.similarity_search_by_vector(np.asarray([vector for _, vector in pending]), k)
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(pending), RAG_BATCH_SEARCH_WORKERS)) as executor:
+                results = list(executor.map(lambda item: store.similarity_search_by_vector(item[1], k=k), pending))
+        for (query, _), documents in zip(pending, results):
+            retrieval_cache.put(query, tuple((doc.page_content, dict(doc.metadata)) for doc in documents), generation)
+
+    def get_retriever(self, k=4):
+        """
+        Returns a retriever over the vectorstore that caches results per question.
+
+        Args:
+            k (int): Number of chunks to retrieve.
+
+        Returns:
+            CachedRetriever: Retriever reusing query embeddings and search results.
+        """
+        # Bound to the store of the version served now, so a swap never affects a chain in use
+        store = self.vectorstore
+        if self.local_store is not None:
+            search = lambda vector: store.similarity_search_by_vector(np.asarray([vector]), k)[0]
+        else:
+            search = lambda vector: store.similarity_search_by_vector(vector, k=k)
+        return CachedRetriever(embed_query=self.embed_query, search=search)
+
+    async def summarize_history(self, summary, messages):
+        """
+        Fold messages that left the history window into the running summary.
+
+        Args:
+            summary (str): The current summary, possibly empty.
+            messages (list): [role, content] pairs to fold in, oldest first.
+
+        Returns:
+            str: The updated summary.
+        """
+        prompt = summary_prompt.format(
+            max_words=RAG_SUMMARY_WORDS,
+            summary=summary or "(none)",
+            messages="\n".join(f"{role.capitalize()}: {content}" for role, content in messages)
+        )
+        response = await llm_client.ainvoke(self.chat_model, prompt)
+        words = str(getattr(response, "content", response)).strip().split()
+        # Hard cap in case the model ignores the length instruction
+        return " ".join(words[:2 * RAG_SUMMARY_WORDS])
 
     def get_qa_chain(self):
         """
         Creates a retrieval-based QA chain with conversation memory.
 
+        The chain takes ``{"question": str, "chat_history": str}``; history is kept by
+        the caller (per session) so the chain itself is stateless and shareable.
+        Retrieved chunks are packed into the RAG_PROMPT_TOKENS budget left over by
+        the history.
+
         Returns:
             RetrievalQA: The QA chain.
         """
-        # Get the retriever
-        retriever = self.vectorstore.as_retriever()
+        # Get the retriever; repeated questions skip embedding and vector search
+        retriever = self.get_retriever()
 
-        # Create prompt template
+        # Create prompt template; context and history appear only in the human message, so the
+        # RAG_PROMPT_TOKENS budget covers them exactly once
         prompt = ChatPromptTemplate.from_messages([
             SystemMessagePromptTemplate.from_template(system_prompt),
             ("human", "Context: {context}\n\nChat History: {chat_history}\n\nQuestion: {question}"),
         ])
 
-        # Helper function to format documents
-        def format_docs(docs):
-            return "\n\n".join(doc.page_content for doc in docs)
+        # Helper function to fit the retrieved documents into what the history left of the budget
+        def format_docs(inputs):
+            budget = RAG_PROMPT_TOKENS - count_tokens(inputs["chat_history"])
+            context = pack_context(inputs["question"], [doc.page_content for doc in inputs["docs"]], budget)
+            return {"context": context, "question": inputs["question"], "chat_history": inputs["chat_history"]}
 
         # Create the QA chain
         qa_chain = (
             RunnableParallel({
-                "context": retriever | format_docs,
-                "question": RunnablePassthrough(),
-                "chat_history": lambda _: "\n".join([
-                    f"{msg.type.capitalize()}: {msg.content}" 
-                    for msg in self.memory.chat_memory.messages
-                ])
+                "docs": itemgetter("question") | retriever,
+                "question": itemgetter("question"),
+                "chat_history": itemgetter("chat_history")
             })
+            | RunnableLambda(format_docs)
             | prompt 
             | self.chat_model
             | StrOutputParser()
@@ -194,15 +851,17 @@ class ConversationalModel:
         """
         Runs the conversational model by processing the documents and enabling interaction.
 
+        A new index version is built first if the documents changed; servers that
+        must not wait for ingestion use ``attach`` instead.
+
         Returns:
             Runnable: The initialized QA chain.
         """
-        # Load documents and create/update vectorstore
-        documents = self.load_documents()
-        self.create_or_update_vectorstore(documents)
+        # Load documents and build a new index version if needed
+        self.rebuild()
 
         # Create the QA chain
-        qa_chain = self.get_qa_chain()
+        qa_chain = self.attach()
         return qa_chain
 
 
@@ -224,6 +883,7 @@ if __name__ == "__main__":
         print("\nInitializing AI Assistant...")
         model = ConversationalModel(pdf_paths=pdf_paths)
         qa_chain = model.run()
+        history = ConversationHistory()
         print("AI Assistant is ready! (Type 'exit' to end the conversation)\n")
 
         while True:
@@ -237,19 +897,19 @@ if __name__ == "__main__":
             
             if query:
                 try:
-                    # Add query to memory
-                    model.memory.chat_memory.add_user_message(query)
-                    
                     # Invoke QA chain
-                    response = qa_chain.invoke(query)
-                    
-                    
+                    response = qa_chain.invoke({"question": query, "chat_history": history.format()})
 
-
-                    # Add response to memory
-                    model.memory.chat_memory.add_ai_message(response)
+                    # Add the exchange to memory
+                    history.add_user_message(query)
+                    history.add_ai_message(response)
                     
                     print("\nAI:", response)
+
+                    # Fold turns that left the window into the running summary
+                    if history.unsummarized:
+                        folded, folded_until = history.pending_summary()
+                        history.fold_summary(asyncio.run(model.summarize_history(history.summary, folded)), folded_until)
                 except Exception as e:
                     print(f"\nError: {str(e)}")
                     print("AI: I apologize, but I encountered an error. Please try asking your question differently.")
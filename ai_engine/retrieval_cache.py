@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.text_utils import normalize_text
+
+# Size and lifetime of the cache of retrieved chunks per query
+RETRIEVAL_CACHE_SIZE = int(os.getenv('RETRIEVAL_CACHE_SIZE', '5000'))
+RETRIEVAL_CACHE_TTL = float(os.getenv('RETRIEVAL_CACHE_TTL', '3600'))
+
+# Size of the cache of query embeddings (they depend only on the text and model, so never expire)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '10000'))
+
+
+class QueryCache:
+    """
+    Bounded LRU/TTL cache keyed by normalized query text.
+
+    Thread-safe, since retrievers run on executor threads. ``invalidate`` bumps
+    ``generation`` so values computed against an older corpus are not stored.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: Maximum number of entries; least recently used are evicted.
+            ttl: Seconds an entry stays valid, or None to keep entries until evicted.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def get(self, query: str) -> Optional[Any]:
+        """Return the fresh cached value for a query, or None."""
+        key = normalize_text(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, value: Any, generation: Optional[int] = None):
+        """
+        Store a value, evicting the least recently used entries past ``max_size``.
+
+        Args:
+            query: The query the value belongs to.
+            value: Value to cache.
+            generation: ``generation`` observed before the value was computed; the
+                value is dropped if the cache was invalidated in the meantime.
+        """
+        key = normalize_text(query)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def invalidate(self):
+        """Drop every entry, e.g. after the corpus was re-ingested."""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    LangChain retriever that reuses query embeddings and search results.
+
+    A repeated question (after normalization) is answered from ``retrieval_cache``
+    without embedding it or querying the vector store; a new question whose
+    embedding is already known (e.g. from the semantic answer cache lookup) skips
+    the embedding call.
+    """
+
+    embed_query: Callable[[str], List[float]]
+    search: Callable[[List[float]], List[Document]]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        cached = retrieval_cache.get(query)
+        if cached is not None:
+            return [Document(page_content=text, metadata=dict(metadata)) for text, metadata in cached]
+
+        generation = retrieval_cache.generation
+        documents = self.search(self.embed_query(query))
+        retrieval_cache.put(
+            query,
+            tuple((doc.page_content, dict(doc.metadata)) for doc in documents),
+            generation
+        )
+        return documents
+
+
+# Normalized query -> retrieved (text, metadata) chunks; invalidated whenever documents are ingested
+retrieval_cache = QueryCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL)
+
+# Normalized query -> embedding, shared by the retriever and the semantic answer cache
+query_embeddings = QueryCache(QUERY_EMBEDDING_CACHE_SIZE)
@@ -1,9 +1,19 @@
 import os
 import re
+import sys
+import asyncio
 from typing import Dict, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import llm_client
+from ai_engine.answer_matching import match_answer, parse_aliases
+from ai_engine.content_pool import ContentPool
+from ai_engine.text_utils import normalize_text
+from ai_engine.verdict_cache import verdict_cache
+
 # Initialize environment
 load_dotenv()
 
@@ -27,6 +37,12 @@ except Exception as e:
     print(f"Error configuring Google API: {e}")
     genai.configure(api_key='')
 
+# Where the riddle buffer is persisted between restarts
+RIDDLE_POOL_PATH = os.getenv('RIDDLE_POOL_PATH', os.path.join('cache', 'riddle_pool.json'))
+
+# Answers longer than this are almost always a parsing error (the model rambling on)
+MAX_ANSWER_LENGTH = 80
+
 # Generation configurations
 generation_config = {
     "temperature": 0.7,
@@ -60,7 +76,6 @@ try:
         generation_config=generation_config, 
         system_instruction=base_prompt,
     )
-    riddle_chat = riddle_model.start_chat()
     
     verification_model = genai.GenerativeModel(
         'gemini-1.5-flash', 
@@ -72,16 +87,125 @@ except Exception as e:
     riddle_model = None
     verification_model = None
 
+def _extract_section(text: str, prefix: str) -> Optional[str]:
+    """Extract a labelled section (RIDDLE, HINT, ANSWER) from the model output."""
+    # Remove possible Markdown formatting
+    text = re.sub(r'\*\*', '', text)
+
+    # More robust regex to extract section
+    pattern = fr'{prefix}:\s*(.+?)(?=\n[A-Z]+:|$)'
+    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+def _validate_riddle(riddle: str, hint: str, answer: str) -> Optional[str]:
+    """Return the reason a parsed riddle is unusable, or None if it is valid."""
+    if not riddle or not hint or not answer:
+        return "missing section"
+    if len(answer) > MAX_ANSWER_LENGTH:
+        return "answer too long"
+    if answer.lower() in riddle.lower():
+        return "answer given away in riddle"
+    return None
+
+async def produce_riddle(complexity: int) -> Optional[Dict]:
+    """
+    Generate, parse and validate one riddle.
+
+    Args:
+        complexity: Complexity level (1-5).
+
+    Returns:
+        Dict with riddle, hint and answer, or None if parsing or validation failed.
+
+    Raises:
+        Exception: The model call failed (quota, network), so the pool counts it apart from bad output.
+    """
+    if not riddle_model:
+        return None
+
+    # Create the full prompt text
+    prompt_text = f""" Generate a riddle about the BNB Blockchain Ecosystem within the Web3 space. 
+The riddle should match the specified complexity level: {complexity}. 
+
+Important: Your response MUST include:
+1. A riddle about blockchain/Web3
+2. A hint to help solve the riddle
+3. The correct answer
+4. Other accepted forms of the answer (abbreviations, alternative names, common spellings)
+
+Please format your response with only this clear sections:
+RIDDLE: [Your riddle text]
+HINT: [A helpful hint]
+ANSWER: [The correct answer]
+ALIASES: [Comma-separated accepted alternatives]
+
+Complexity Level: {complexity}
+"""
+
+    # Generate riddle
+    result = await llm_client.generate_content(riddle_model, prompt_text)
+
+    try:
+        # Extract sections
+        riddle = _extract_section(result.text, 'RIDDLE')
+        hint = _extract_section(result.text, 'HINT')
+        answer = _extract_section(result.text, 'ANSWER')
+        aliases = parse_aliases(_extract_section(result.text, 'ALIASES'))
+
+        # Fallback parsing if section extraction fails
+        if not riddle:
+            riddle_match = re.search(r'I am\s.+?\?', result.text, re.IGNORECASE)
+            if riddle_match:
+                riddle = riddle_match.group(0).strip()
+
+        # Validate extracted information
+        problem = _validate_riddle(riddle, hint, answer)
+        if problem:
+            print(f"Discarding riddle ({problem}). Full text:", result.text)
+            return None
+
+        return {
+            "riddle": riddle,
+            "hint": hint,
+            "answer": answer,
+            "aliases": aliases
+        }
+
+    except Exception as e:
+        print(f"Detailed Error parsing riddle: {e}")
+        return None
+
+# Validated riddles per complexity level, refilled in the background. Riddles are generated
+# without chat history, so a repeated riddle with the same answer is dropped.
+riddle_pool = ContentPool(
+    "riddle",
+    produce_riddle,
+    persist_path=RIDDLE_POOL_PATH,
+    key=lambda item: (normalize_text(item["riddle"]), normalize_text(item["answer"]))
+)
+
 class RiddleGame:
+    # One instance per player session: slots keep idle sessions small
+    __slots__ = (
+        "complexity",
+        "attempts",
+        "current_riddle",
+        "current_answer",
+        "current_aliases",
+        "current_hint",
+    )
+
+    max_attempts = 5
+
     def __init__(self):
         self.complexity = 1
         self.attempts = 0
-        self.max_attempts = 5  
         self.current_riddle = None
         self.current_answer = None
+        self.current_aliases = ()
         self.current_hint = None
     
-    def generate_break_options(self) -> str:
+    async def generate_break_options(self) -> str:
         """Generate break options using the AI model."""
         try:
             base_prompt = _load_prompt("quizzes_prompt.txt")
@@ -90,7 +214,7 @@ class RiddleGame:
             User wants to take a break from the blockchain riddle game. 
             Generate a friendly response suggesting alternative activities using the base prompt: {base_prompt}"""
             
-            result = riddle_model.generate_content(prompt)
+            result = await llm_client.generate_content(riddle_model, prompt)
             return result.text.strip()
         
         except Exception as e:
@@ -102,11 +226,16 @@ class RiddleGame:
 4. Learn some fun facts or trivia about blockchain and Web3.
 5. Play a short mini-game or puzzle related to blockchain."""
 
-    def verify_answer(self, correct_answer: str, user_answer: str) -> bool:
+    async def verify_answer(self, correct_answer: str, user_answer: str) -> bool:
         """Verify if the user's answer is equivalent to the correct answer"""
         if not verification_model:
             # Fallback to simple comparison if verification model fails
             return self.simple_answer_check(correct_answer, user_answer)
+
+        # Common answers to the same question are judged once and shared across sessions
+        cached = verdict_cache.get(correct_answer, user_answer)
+        if cached is not None:
+            return cached
         
         try:
             # Construct verification prompt
@@ -117,13 +246,15 @@ User Answer: {user_answer}
 Are these answers equivalent?"""
             
             # Generate verification
-            result = verification_model.generate_content(verification_text)
+            result = await llm_client.generate_content(verification_model, verification_text)
             verification = result.text.strip().upper()
             
             print(f"Verification Result: {verification}")  
             
             # Check verification result
-            return 'EQUIVALENT' in verification
+            is_equivalent = 'EQUIVALENT' in verification
+            verdict_cache.put(correct_answer, user_answer, is_equivalent)
+            return is_equivalent
         
         except Exception as e:
             print(f"Verification error: {e}")
@@ -138,8 +269,8 @@ Are these answers equivalent?"""
         
         return normalize_answer(correct_answer) == normalize_answer(user_answer)
 
-    def generate_riddle(self) -> Dict:
-        """Generate a riddle with comprehensive error handling and improved parsing"""
+    async def generate_riddle(self) -> Dict:
+        """Serve a riddle from the background buffer, generating one inline on a miss"""
         if not riddle_model:
             return {
                 "error": "AI model not initialized",
@@ -149,77 +280,35 @@ Are these answers equivalent?"""
                 "attempts_remaining": self.max_attempts
             }
         
-        try:
-            # Create the full prompt text
-            prompt_text = f""" Generate a riddle about the BNB Blockchain Ecosystem within the Web3 space. 
-The riddle should match the specified complexity level: {self.complexity}. 
-
-Important: Your response MUST include:
-1. A riddle about blockchain/Web3
-2. A hint to help solve the riddle
-3. The correct answer
-
-Please format your response with only this clear sections:
-RIDDLE: [Your riddle text]
-HINT: [A helpful hint]
-ANSWER: [The correct answer]
+        item = riddle_pool.take(self.complexity)
+        if item is None:
+            # Buffer drained (or cold start): generate inline for this request
+            item = await riddle_pool.produce(self.complexity)
 
-Complexity Level: {self.complexity}
-"""
-            
-            # Generate riddle
-            result = riddle_chat.send_message(prompt_text)
-            
-            # Improved parsing function
-            def extract_section(text, prefix):
-                # Remove possible Markdown formatting
-                text = re.sub(r'\*\*', '', text)
-                
-                # More robust regex to extract section
-                pattern = fr'{prefix}:\s*(.+?)(?=\n[A-Z]+:|$)'
-                match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-                return match.group(1).strip() if match else None
-            
-            # Extract sections
-            riddle = extract_section(result.text, 'RIDDLE')
-            hint = extract_section(result.text, 'HINT')
-            answer = extract_section(result.text, 'ANSWER')
-            
-            # Fallback parsing if section extraction fails
-            if not riddle:
-                riddle_match = re.search(r'I am\s.+?\?', result.text, re.IGNORECASE)
-                if riddle_match:
-                    riddle = riddle_match.group(0).strip()
-            
-            # Validate extracted information
-            if not riddle or not hint or not answer:
-                print("Parsing failed. Full text:", result.text)
-                raise ValueError("Could not extract complete riddle information")
-                
-            self.current_riddle = riddle
-            self.current_answer = answer
-            self.current_hint = hint
-            self.attempts = 0
-            
-            return {
-                "riddle": riddle,
-                "hint": hint,
-                "complexity": self.complexity,
-                "attempts_remaining": self.max_attempts
-            }
-            
-        except Exception as e:
-            print(f"Detailed Error generating riddle: {e}")
+        if item is None:
             return {
-                "error": f"Error generating riddle: {e}",
+                "error": "Error generating riddle: no valid riddle could be generated",
                 "riddle": "Technical difficulty encountered",
                 "hint": "Please try again",
                 "complexity": self.complexity,
                 "attempts_remaining": self.max_attempts
             }
 
-    def check_answer(self, user_answer: str) -> Dict:
-        """Check if the provided answer is correct with AI verification"""
+        self.current_riddle = item["riddle"]
+        self.current_answer = item["answer"]
+        self.current_aliases = item.get("aliases", [])
+        self.current_hint = item["hint"]
+        self.attempts = 0
+
+        return {
+            "riddle": item["riddle"],
+            "hint": item["hint"],
+            "complexity": self.complexity,
+            "attempts_remaining": self.max_attempts
+        }
+
+    async def check_answer(self, user_answer: str) -> Dict:
+        """Check if the provided answer is correct, matching aliases locally before AI verification"""
         if not self.current_answer:
             return {
                 "correct": False,
@@ -230,8 +319,10 @@ Complexity Level: {self.complexity}
         user_answer = user_answer.strip()
         self.attempts += 1
         
-        # Use AI verification
-        is_correct = self.verify_answer(self.current_answer, user_answer)
+        # Match against the answer and its aliases locally; only ambiguous answers go to the AI
+        is_correct = match_answer(user_answer, self.current_answer, self.current_aliases)
+        if is_correct is None:
+            is_correct = await self.verify_answer(self.current_answer, user_answer)
         
         if is_correct:
             # Correct answer
@@ -268,7 +359,7 @@ def main():
             print("Error: AI models could not be initialized. Cannot start game.")
             return False
 
-        response = game.generate_riddle()
+        response = asyncio.run(game.generate_riddle())
         if "error" in response:
             print(f"\nError: {response['error']}")
             return False
@@ -284,14 +375,14 @@ def main():
             if user_answer.lower() == 'quit':
                 return False
             
-            answer_result = game.check_answer(user_answer)
+            answer_result = asyncio.run(game.check_answer(user_answer))
             print(answer_result['message'])
             
             if answer_result['correct']:
                 # Offer choice after correct answer
                 choice = input("\nOptions:\n1. Continue Playing\n2. Take a Break\nChoose (1/2): ").strip()
                 if choice == '2':
-                    print(game.generate_break_options())
+                    print(asyncio.run(game.generate_break_options()))
                     return False
                 elif choice == '1':
                     return play_game()
@@ -300,7 +391,7 @@ def main():
                 # Offer choice after failed attempts
                 choice = input("\nOptions:\n1. Try Again\n2. Take a Break\nChoose (1/2): ").strip()
                 if choice == '2':
-                    print(game.generate_break_options())
+                    print(asyncio.run(game.generate_break_options()))
                     return False
                 elif choice == '1':
                     return play_game()
@@ -0,0 +1,171 @@
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.text_utils import normalize_text
+
+# Cosine similarity at or above which a cached answer is reused for a new query
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92'))
+
+# Maximum number of cached answers; least recently used are evicted
+SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', '2000'))
+
+
+class SemanticCache:
+    """
+    In-memory cache of RAG answers keyed by query embedding.
+
+    Query vectors are kept L2-normalized in one preallocated NumPy matrix, so a
+    lookup is a single matrix-vector product over every cached query. Exact
+    repeats (after normalization) are answered from a dict without embedding.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_size: int = SEMANTIC_CACHE_SIZE):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cached answer to be reused.
+            max_size: Maximum number of cached answers.
+        """
+        self.threshold = threshold
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._last_used = np.zeros(max_size, dtype=np.int64)
+        self._answers: List[Optional[str]] = [None] * max_size
+        self._queries: List[Optional[str]] = [None] * max_size
+        self._by_text: Dict[str, int] = {}
+        self._size = 0
+        self._clock = 0
+        # Bumped on every invalidation so answers computed against an older corpus are not stored
+        self.generation = 0
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _touch(self, slot: int):
+        self._clock += 1
+        self._last_used[slot] = self._clock
+
+    def get_exact(self, query: str) -> Optional[str]:
+        """
+        Return the cached answer for a textually identical query, without embedding it.
+
+        Args:
+            query: The user's question.
+
+        Returns:
+            The cached answer, or None.
+        """
+        with self._lock:
+            slot = self._by_text.get(normalize_text(query))
+            if slot is None:
+                return None
+            self._touch(slot)
+            self.hits += 1
+            self.exact_hits += 1
+            return self._answers[slot]
+
+    def get(self, vector: Sequence[float]) -> Tuple[Optional[str], float]:
+        """
+        Find the cached answer whose query is most similar to ``vector``.
+
+        Args:
+            vector: Embedding of the incoming query.
+
+        Returns:
+            Tuple of (answer or None if below the threshold, best similarity).
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        with self._lock:
+            if not self._size or not norm or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None, 0.0
+
+            similarities = self._vectors[:self._size] @ (query / norm)
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None, similarity
+
+            self._touch(slot)
+            self.hits += 1
+            return self._answers[slot], similarity
+
+    def put(self, query: str, vector: Sequence[float], answer: str, generation: Optional[int] = None):
+        """
+        Cache an answer, evicting the least recently used entry when full.
+
+        Args:
+            query: The user's question.
+            vector: Embedding of the question.
+            answer: The answer to reuse for similar questions.
+            generation: ``generation`` observed before the answer was computed; the
+                answer is dropped if the corpus was re-ingested in the meantime.
+        """
+        embedding = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if not norm:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if self._vectors is None or self._vectors.shape[1] != embedding.shape[0]:
+                self._reset(embedding.shape[0])
+
+            key = normalize_text(query)
+            slot = self._by_text.get(key)
+            if slot is None:
+                if self._size < self.max_size:
+                    slot = self._size
+                    self._size += 1
+                else:
+                    slot = int(np.argmin(self._last_used[:self._size]))
+                    del self._by_text[self._queries[slot]]
+                    self.evicted += 1
+
+            self._vectors[slot] = embedding / norm
+            self._answers[slot] = answer
+            self._queries[slot] = key
+            self._by_text[key] = slot
+            self._touch(slot)
+
+    def _reset(self, dimension: Optional[int] = None):
+        self._vectors = np.zeros((self.max_size, dimension), dtype=np.float32) if dimension else None
+        self._answers = [None] * self.max_size
+        self._queries = [None] * self.max_size
+        self._by_text.clear()
+        self._size = 0
+
+    def invalidate(self):
+        """Drop every cached answer, e.g. after the corpus was re-ingested."""
+        with self._lock:
+            self._reset()
+            self.generation += 1
+
+    def stats(self) -> Dict:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "generation": self.generation,
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Shared by every /rag/query request; invalidated whenever documents are ingested
+answer_cache = SemanticCache()
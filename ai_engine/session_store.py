@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import uuid
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Generic, Optional, Tuple, Type, TypeVar
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.storage import StorageBackend, get_backend
+
+# Seconds of inactivity after which a session is dropped
+SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', '86400'))
+
+# Threads for SQLite/Redis session calls, kept apart from the LLM executor so session
+# loads and saves never queue behind slow model calls
+SESSION_EXECUTOR_WORKERS = int(os.getenv('SESSION_EXECUTOR_WORKERS', '8'))
+
+_executor = ThreadPoolExecutor(max_workers=SESSION_EXECUTOR_WORKERS, thread_name_prefix="session")
+
+T = TypeVar('T')
+
+
+def new_session_id() -> str:
+    """Generate a random session identifier."""
+    return uuid.uuid4().hex
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode_value(value):
+    if "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def dump_state(state) -> bytes:
+    """Serialize a ``__slots__`` object as a compact JSON array of its slot values."""
+    values = [getattr(state, name) for name in type(state).__slots__]
+    return json.dumps(values, separators=(',', ':'), default=_encode_value).encode('utf-8')
+
+
+def load_state(state_class: Type[T], data: bytes) -> T:
+    """
+    Rebuild a ``__slots__`` object serialized by ``dump_state``.
+
+    Slots added to the class after the state was serialized are set to None.
+    """
+    state = state_class.__new__(state_class)
+    values = json.loads(data, object_hook=_decode_value)
+    values.extend([None] * (len(state_class.__slots__) - len(values)))
+    for name, value in zip(state_class.__slots__, values):
+        setattr(state, name, value)
+    return state
+
+
+class SessionStore(Generic[T]):
+    """
+    Session-keyed store of per-player state on top of a pluggable storage backend.
+
+    State objects must declare ``__slots__``. With the in-memory backend they are
+    kept as live objects; with shared backends (SQLite, Redis) they are serialized
+    as a compact JSON array of slot values, so any worker can serve any request.
+    Callers must ``save`` after mutating state. Async code uses ``aget``/``asave``,
+    which run calls on blocking backends in a small dedicated executor.
+    """
+
+    def __init__(
+        self,
+        state_class: Type[T],
+        namespace: str,
+        factory: Optional[Callable[[], T]] = None,
+        backend: Optional[StorageBackend] = None,
+        idle_ttl: float = SESSION_IDLE_TTL
+    ):
+        """
+        Args:
+            state_class: Class of the stored state (e.g. ``RiddleGame``).
+            namespace: Key prefix separating this store from others on the same backend.
+            factory: Creates fresh state for a new session; defaults to ``state_class``.
+            backend: Storage backend; defaults to the one configured by SESSION_STORE_URL.
+            idle_ttl: Seconds of inactivity before a session expires.
+        """
+        self.state_class = state_class
+        self.namespace = namespace
+        self.factory = factory or state_class
+        self.backend = backend or get_backend()
+        self.idle_ttl = idle_ttl
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.namespace}:{session_id}"
+
+    def get(self, session_id: Optional[str]) -> Optional[T]:
+        """
+        Return the state of an existing session.
+
+        Args:
+            session_id: The session identifier, if the client sent one.
+
+        Returns:
+            The session state, or None if the session is unknown or expired.
+        """
+        if not session_id:
+            return None
+        data = self.backend.get(self._key(session_id))
+        if data is None:
+            return None
+        return data if self.backend.stores_objects else load_state(self.state_class, data)
+
+    def save(self, session_id: str, state: T, ttl: Optional[float] = None):
+        """
+        Store state for a session and refresh its idle timer.
+
+        Args:
+            session_id: The session identifier.
+            state: The state to store.
+            ttl: Lifetime in seconds, defaulting to the store's idle TTL.
+        """
+        value = state if self.backend.stores_objects else dump_state(state)
+        self.backend.set(self._key(session_id), value, ttl or self.idle_ttl)
+
+    def delete(self, session_id: str):
+        """Remove a session."""
+        self.backend.delete(self._key(session_id))
+
+    async def _run(self, function: Callable, *args):
+        """Call in-memory backends directly, and others on the session executor."""
+        if self.backend.blocking:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, functools.partial(function, *args))
+        return function(*args)
+
+    async def aget(self, session_id: Optional[str]) -> Optional[T]:
+        """Async equivalent of ``get``."""
+        return await self._run(self.get, session_id)
+
+    async def asave(self, session_id: str, state: T, ttl: Optional[float] = None):
+        """Async equivalent of ``save``."""
+        await self._run(self.save, session_id, state, ttl)
+
+    async def astats(self) -> Dict:
+        """Async equivalent of ``stats``."""
+        return await self._run(self.stats)
+
+    def get_or_create(self, session_id: Optional[str]) -> Tuple[str, T]:
+        """
+        Return the state of a session, creating it (and an id if needed) when missing.
+
+        New state is not stored until the caller saves it.
+
+        Args:
+            session_id: The session identifier, if the client sent one.
+
+        Returns:
+            Tuple of (session id, session state).
+        """
+        state = self.get(session_id)
+        if state is None:
+            session_id = session_id or new_session_id()
+            state = self.factory()
+        return session_id, state
+
+    def reset(self, session_id: Optional[str]) -> Tuple[str, T]:
+        """Replace a session's state with a fresh one."""
+        session_id = session_id or new_session_id()
+        state = self.factory()
+        self.save(session_id, state)
+        return session_id, state
+
+    def stats(self) -> Dict:
+        """Return the number of live sessions in this namespace."""
+        try:
+            return {"sessions": self.backend.count(f"{self.namespace}:")}
+        except Exception as e:
+            return {"sessions": None, "error": str(e)}
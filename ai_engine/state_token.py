@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import zlib
+import base64
+import hashlib
+import secrets
+from typing import Optional, Type, TypeVar
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.exceptions import InvalidTag
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.session_store import SESSION_IDLE_TTL, dump_state, load_state
+
+# Secret used to encrypt and authenticate game-state tokens. Every worker and
+# instance must share it; any string works, it is stretched to a 256-bit key.
+STATE_TOKEN_SECRET = os.getenv('STATE_TOKEN_SECRET')
+
+# Seconds a token stays valid after it was issued
+STATE_TOKEN_TTL = float(os.getenv('STATE_TOKEN_TTL', str(SESSION_IDLE_TTL)))
+
+_VERSION = 1
+_COMPRESSED = 0x80
+_NONCE_SIZE = 12
+
+T = TypeVar('T')
+
+# A per-process key would make every worker reject the others' tokens, and all tokens after a restart
+if not STATE_TOKEN_SECRET:
+    raise RuntimeError("STATE_TOKEN_SECRET must be set to use game-state tokens (SESSION_MODE=token)")
+
+_aead = AESGCM(hashlib.sha256(STATE_TOKEN_SECRET.encode('utf-8')).digest())
+
+
+def encode_state(state, namespace: str) -> str:
+    """
+    Seal a ``__slots__`` state object into a compact, encrypted and signed token.
+
+    The token is ``base64url(header | nonce | AES-GCM(expiry + state))`` with the
+    namespace bound as associated data, so a quiz token cannot be replayed as a
+    riddle token.
+
+    Args:
+        state: The game state (e.g. ``RiddleGame``).
+        namespace: Which game the token belongs to.
+
+    Returns:
+        The URL-safe token string.
+    """
+    expires_at = int(time.time() + STATE_TOKEN_TTL)
+    plaintext = expires_at.to_bytes(4, 'big') + dump_state(state)
+
+    header = _VERSION
+    compressed = zlib.compress(plaintext, 9)
+    if len(compressed) < len(plaintext):
+        plaintext = compressed
+        header |= _COMPRESSED
+
+    nonce = secrets.token_bytes(_NONCE_SIZE)
+    aad = bytes([header]) + namespace.encode('utf-8')
+    sealed = bytes([header]) + nonce + _aead.encrypt(nonce, plaintext, aad)
+    return base64.urlsafe_b64encode(sealed).rstrip(b'=').decode('ascii')
+
+
+def decode_state(token: Optional[str], state_class: Type[T], namespace: str) -> Optional[T]:
+    """
+    Verify, decrypt and rebuild a state object from a token.
+
+    Args:
+        token: Token produced by ``encode_state``, or None.
+        state_class: Class of the state to rebuild.
+        namespace: Which game the token must belong to.
+
+    Returns:
+        The state, or None if the token is missing, tampered with, expired or from another game.
+    """
+    if not token:
+        return None
+    try:
+        sealed = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        header, nonce, ciphertext = sealed[0], sealed[1:1 + _NONCE_SIZE], sealed[1 + _NONCE_SIZE:]
+        if header & ~_COMPRESSED != _VERSION:
+            return None
+
+        aad = bytes([header]) + namespace.encode('utf-8')
+        plaintext = _aead.decrypt(nonce, ciphertext, aad)
+        if header & _COMPRESSED:
+            plaintext = zlib.decompress(plaintext)
+
+        if int.from_bytes(plaintext[:4], 'big') < time.time():
+            return None
+        return load_state(state_class, plaintext[4:])
+    except (InvalidTag, ValueError, IndexError, zlib.error):
+        return None
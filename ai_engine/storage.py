@@ -0,0 +1,416 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse, unquote
+
+# Where per-player state lives: memory:// (single process), sqlite:///path/to.db
+# (several workers on one host) or redis://host:port/db (several hosts)
+SESSION_STORE_URL = os.getenv('SESSION_STORE_URL', 'memory://')
+
+# Maximum entries kept by the in-memory backend; least recently used are evicted
+SESSION_CAPACITY = int(os.getenv('SESSION_CAPACITY', '1000000'))
+
+
+class StorageBackend:
+    """
+    Minimal key/value interface shared by every session backend.
+
+    Values are bytes, except for backends with ``stores_objects`` set, which keep
+    Python objects as-is and skip serialization entirely. Calls on ``blocking``
+    backends do I/O and must be run off the event loop (see ``SessionStore.aget``).
+    """
+
+    stores_objects = False
+    blocking = True
+
+    def __init__(self):
+        self.operations = 0
+        self.op_seconds = 0.0
+
+    def _timed(self, started: float):
+        self.operations += 1
+        self.op_seconds += time.perf_counter() - started
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def count(self, prefix: str = "") -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """Return operation count and mean latency per storage call."""
+        return {
+            "backend": type(self).__name__,
+            "operations": self.operations,
+            "mean_op_us": round(self.op_seconds / self.operations * 1e6, 2) if self.operations else 0.0
+        }
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Process-local LRU store with per-entry TTL. Values are stored without serialization.
+
+    Entries are counted per namespace (the key up to its first ``:``), so
+    ``count`` of a namespace is O(1). With ``max_bytes`` and ``sizeof`` set, least
+    recently used entries are also evicted once the values' approximate total
+    size exceeds ``max_bytes``.
+    """
+
+    stores_objects = True
+    blocking = False
+
+    def __init__(self, capacity: int = SESSION_CAPACITY, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        """
+        Args:
+            capacity: Maximum number of entries.
+            max_bytes: Maximum approximate total size of the values, if any.
+            sizeof: Approximate size in bytes of a value; needed for ``max_bytes``.
+        """
+        super().__init__()
+        self.capacity = capacity
+        self.max_bytes = max_bytes if sizeof is not None else None
+        self.sizeof = sizeof
+        # Key -> (value, expiry, approximate size)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._namespace_counts: Counter = Counter()
+        self.bytes = 0
+        self.evicted = 0
+
+    @staticmethod
+    def _namespace(key: str) -> str:
+        return key[:key.find(':') + 1]
+
+    def _removed(self, key: str, entry: Tuple[Any, float, int]):
+        self.bytes -= entry[2]
+        namespace = self._namespace(key)
+        self._namespace_counts[namespace] -= 1
+        if not self._namespace_counts[namespace]:
+            del self._namespace_counts[namespace]
+
+    def _over_limit(self) -> bool:
+        if len(self._entries) > self.capacity:
+            return True
+        # The newest entry is kept even if it alone exceeds max_bytes
+        return self.max_bytes is not None and self.bytes > self.max_bytes and len(self._entries) > 1
+
+    def get(self, key: str) -> Optional[Any]:
+        started = time.perf_counter()
+        try:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                self._removed(key, entry)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+        finally:
+            self._timed(started)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        started = time.perf_counter()
+        expires_at = time.monotonic() + ttl if ttl else float('inf')
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        previous = self._entries.get(key)
+        if previous is None:
+            self._namespace_counts[self._namespace(key)] += 1
+        else:
+            self.bytes -= previous[2]
+        self._entries[key] = (value, expires_at, size)
+        self.bytes += size
+        self._entries.move_to_end(key)
+        while self._over_limit():
+            evicted_key, entry = self._entries.popitem(last=False)
+            self._removed(evicted_key, entry)
+            self.evicted += 1
+        self._timed(started)
+
+    def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._removed(key, entry)
+
+    def count(self, prefix: str = "") -> int:
+        """Entries under a key prefix; expired entries not yet purged are included."""
+        if not prefix:
+            return len(self._entries)
+        if self._namespace(prefix) == prefix:
+            return self._namespace_counts.get(prefix, 0)
+        return sum(1 for key in self._entries if key.startswith(prefix))
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats.update({"entries": len(self._entries), "capacity": self.capacity, "evicted": self.evicted})
+        if self.max_bytes is not None:
+            stats.update({"bytes": self.bytes, "max_bytes": self.max_bytes})
+        return stats
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    SQLite store in WAL mode, shared by every worker process on the host.
+
+    Calls block (on disk, and on other writers for up to the busy timeout), so
+    async code goes through ``SessionStore.aget``/``asave``.
+    """
+
+    # Expired rows are purged once every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        super().__init__()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        started = time.perf_counter()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value FROM kv WHERE key = ? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+            return row[0] if row else None
+        finally:
+            self._timed(started)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        started = time.perf_counter()
+        expires_at = time.time() + ttl if ttl else float('inf')
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, value, expires_at)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+        self._timed(started)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def count(self, prefix: str = "") -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM kv WHERE key >= ? AND key < ? AND expires_at > ?",
+                (prefix, prefix + "\U0010ffff", time.time())
+            ).fetchone()
+        return row[0]
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RedisBackend(StorageBackend):
+    """
+    Store speaking the Redis protocol (RESP2) over a single persistent connection.
+
+    Works with Redis, Valkey, KeyDB or any local stand-in that implements
+    GET, SET (with PX), DEL, SCAN and AUTH/SELECT.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._reader = None
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._roundtrip(b'AUTH', self.password)
+        if self.db:
+            self._roundtrip(b'SELECT', str(self.db))
+
+    def _close(self):
+        try:
+            if self._sock:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._reader = None
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode('utf-8')
+            elif not isinstance(arg, bytes):
+                arg = str(arg).encode('ascii')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload
+        if kind == b'-':
+            raise RedisError(payload.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply type: {line!r}")
+
+    def _roundtrip(self, *args):
+        self._sock.sendall(self._encode(*args))
+        return self._read_reply()
+
+    def command(self, *args):
+        """Send one command, reconnecting once if the connection dropped."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._roundtrip(*args)
+                except (ConnectionError, OSError):
+                    self._close()
+                    if attempt:
+                        raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        started = time.perf_counter()
+        try:
+            return self.command(b'GET', key)
+        finally:
+            self._timed(started)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        started = time.perf_counter()
+        try:
+            if ttl:
+                self.command(b'SET', key, value, b'PX', max(1, int(ttl * 1000)))
+            else:
+                self.command(b'SET', key, value)
+        finally:
+            self._timed(started)
+
+    def delete(self, key: str):
+        self.command(b'DEL', key)
+
+    def count(self, prefix: str = "") -> int:
+        total, cursor = 0, b'0'
+        while True:
+            cursor, keys = self.command(b'SCAN', cursor, b'MATCH', prefix + '*', b'COUNT', 1000)
+            total += len(keys)
+            if cursor in (b'0', 0):
+                return total
+
+
+def create_backend(url: str = SESSION_STORE_URL) -> StorageBackend:
+    """
+    Build a storage backend from a URL.
+
+    Args:
+        url: ``memory://``, ``sqlite:///relative/path.db``, ``sqlite:////absolute/path.db``
+            or ``redis://[:password@]host:port/db``.
+
+    Returns:
+        The configured backend.
+    """
+    scheme = url.split('://', 1)[0].lower()
+    if scheme == 'memory':
+        return MemoryBackend()
+    if scheme == 'sqlite':
+        return SQLiteBackend(url.split('://', 1)[1][1:] or os.path.join('cache', 'sessions.db'))
+    if scheme in ('redis', 'valkey'):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported session store URL: {url}")
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def get_backend() -> StorageBackend:
+    """Return the process-wide backend configured by SESSION_STORE_URL."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def main():
+    """Measure per-request storage overhead (one load + one save of quiz state) for each backend."""
+    import sys
+    import tempfile
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from ai_engine.session_store import SessionStore, dump_state
+    from ai_engine.quiz_handler import BlockchainQuizGame
+
+    requests = 20000
+    urls = ['memory://', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"]
+    urls.extend(sys.argv[1:])  # e.g. redis://localhost:6379/0
+
+    for url in urls:
+        store = SessionStore(BlockchainQuizGame, "bench", backend=create_backend(url))
+        game = BlockchainQuizGame()
+        game.current_question = "Which consensus mechanism does BNB Smart Chain use?"
+        game.current_options = ["A) Proof of Work", "B) Proof of Staked Authority", "C) Proof of History", "D) Delegated BFT"]
+        game.current_answer = "B"
+        game.current_hint = "Validators stake BNB and take turns producing blocks."
+
+        session_ids = [f"session-{i % 1000}" for i in range(requests)]
+        for session_id in session_ids[:1000]:
+            store.save(session_id, game)
+
+        started = time.perf_counter()
+        for session_id in session_ids:
+            state = store.get(session_id)
+            state.attempts += 1
+            store.save(session_id, state)
+        elapsed = time.perf_counter() - started
+
+        print(f"{url.split('://')[0]:>8}: {elapsed / requests * 1e6:8.1f} us per request "
+              f"({len(dump_state(game))} bytes serialized state)")
+
+
+if __name__ == "__main__":
+    main()
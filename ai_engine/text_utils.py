@@ -0,0 +1,6 @@
+import re
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so trivial variants share a key."""
+    return " ".join(re.sub(r'[^\w\s]', ' ', text or '').lower().split())
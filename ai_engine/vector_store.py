@@ -0,0 +1,249 @@
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Base path of the local vector store (<path>.npy holds vectors, <path>.json ids and metadata)
+LOCAL_VECTOR_PATH = os.getenv('LOCAL_VECTOR_PATH', os.path.join('cache', 'vectors', 'questbot'))
+
+# Number of IVF lists (0 disables the IVF index and always searches exhaustively)
+LOCAL_VECTOR_IVF_LISTS = int(os.getenv('LOCAL_VECTOR_IVF_LISTS', '0'))
+
+# IVF lists probed per query; more probes trade speed for recall
+LOCAL_VECTOR_IVF_PROBES = int(os.getenv('LOCAL_VECTOR_IVF_PROBES', '8'))
+
+# Minimum vectors per IVF list before the IVF index is used at all
+_IVF_MIN_PER_LIST = 32
+
+
+class LocalVectorStore:
+    """
+    In-process vector store over a NumPy matrix of L2-normalized embeddings.
+
+    Exposes the ``upsert(vectors=...)`` / ``delete(ids=...)`` calls ingestion makes
+    on a Pinecone index, with records of the same shape (``id``, ``values``,
+    ``metadata`` with the chunk under ``text``), so either backend can be fed by the
+    same code. Vectors are memory-mapped from a ``.npy`` file; search is an exact,
+    batched top-k dot product, or an IVF (inverted file) probe when
+    ``ivf_lists`` is set and the corpus is large enough. Upserts write into a
+    buffer whose capacity doubles as it fills, so ingesting n vectors in batches
+    copies O(n) rows in total.
+    """
+
+    def __init__(self, path: str = LOCAL_VECTOR_PATH, ivf_lists: int = LOCAL_VECTOR_IVF_LISTS,
+                 ivf_probes: int = LOCAL_VECTOR_IVF_PROBES):
+        """
+        Args:
+            path: Base path of the store files, without extension.
+            ivf_lists: Number of IVF lists to cluster vectors into (0 for exact search only).
+            ivf_probes: IVF lists searched per query.
+        """
+        self.path = path
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._metadatas: List[Dict] = []
+        self._vectors: Optional[np.ndarray] = None
+        # Writable array whose first len(self) rows are the vectors, or None while they are memory-mapped
+        self._buffer: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._dirty = False
+        # Bumped by every upsert and delete, so a reload never overwrites newer in-memory changes
+        self._generation = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def load(self):
+        """
+        Memory-map the store from disk.
+
+        The IVF index is built without holding the lock, so searches carry on
+        over the previous state meanwhile; it is swapped in with the vectors.
+        """
+        with self._lock:
+            generation = self._generation
+        self._load(generation)
+
+    def _load(self, generation: int):
+        try:
+            with open(self.path + '.json', 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            vectors = np.load(self.path + '.npy', mmap_mode='r')
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error loading local vector store: {e}")
+            return
+
+        count = min(len(saved["ids"]), len(vectors))
+        vectors = vectors[:count]
+        centroids, lists = self._build_ivf(vectors)
+        with self._lock:
+            if self._generation != generation:
+                # Upserted or deleted meanwhile; the in-memory state is newer and still unsaved
+                return
+            self._ids = saved["ids"][:count]
+            self._metadatas = saved["metadatas"][:count]
+            self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+            self._vectors = vectors
+            self._buffer = None
+            self._centroids, self._lists = centroids, lists
+
+    def save(self):
+        """Write pending changes to disk atomically and re-map the vectors."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            vectors = self._vectors if self._vectors is not None else np.zeros((0, 0), dtype=np.float32)
+            with open(self.path + '.npy.tmp', 'wb') as file:
+                np.save(file, vectors)
+            with open(self.path + '.json.tmp', 'w', encoding='utf-8') as file:
+                json.dump({"ids": self._ids, "metadatas": self._metadatas}, file)
+            os.replace(self.path + '.npy.tmp', self.path + '.npy')
+            os.replace(self.path + '.json.tmp', self.path + '.json')
+            self._dirty = False
+            generation = self._generation
+        self._load(generation)
+
+    def _reserve(self, rows: int, dimension: int):
+        """Make ``self._buffer`` writable with room for ``rows`` vectors, at least doubling its capacity when it grows."""
+        if self._buffer is not None and len(self._buffer) >= rows:
+            return
+        capacity = max(rows, 2 * len(self._buffer) if self._buffer is not None else 0, 64)
+        buffer = np.empty((capacity, dimension), dtype=np.float32)
+        count = len(self._ids)
+        if count:
+            buffer[:count] = self._vectors
+        self._buffer = buffer
+
+    def upsert(self, vectors: Sequence[Dict]):
+        """
+        Insert or replace records (Pinecone ``Index.upsert`` compatible).
+
+        Args:
+            vectors: Records with ``id``, ``values`` and ``metadata``.
+        """
+        if not vectors:
+            return
+        values = np.asarray([record["values"] for record in vectors], dtype=np.float32)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._reserve(len(self._ids) + len(vectors), values.shape[1])
+            for record, vector in zip(vectors, values):
+                row = self._rows.get(record["id"])
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[record["id"]] = row
+                    self._ids.append(record["id"])
+                    self._metadatas.append(record.get("metadata", {}))
+                else:
+                    self._metadatas[row] = record.get("metadata", {})
+                self._buffer[row] = vector
+            self._vectors = self._buffer[:len(self._ids)]
+            self._generation += 1
+            self._dirty = True
+            # Exact search until the IVF index is rebuilt on save
+            self._centroids = None
+
+    def delete(self, ids: Sequence[str]):
+        """Remove records by id (Pinecone ``Index.delete`` compatible)."""
+        with self._lock:
+            drop = {self._rows[vector_id] for vector_id in ids if vector_id in self._rows}
+            if not drop:
+                return
+            keep = [row for row in range(len(self._ids)) if row not in drop]
+            self._vectors = np.array(self._vectors[keep]) if keep else None
+            self._buffer = self._vectors
+            self._ids = [self._ids[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+            self._generation += 1
+            self._dirty = True
+            self._centroids = None
+
+    def _build_ivf(self, vectors: np.ndarray, iterations: int = 10) -> Tuple[Optional[np.ndarray], List[np.ndarray]]:
+        """Cluster vectors into ``ivf_lists`` lists with spherical k-means; returns (centroids, lists), or (None, [])."""
+        count = len(vectors)
+        if self.ivf_lists <= 0 or count < self.ivf_lists * _IVF_MIN_PER_LIST:
+            return None, []
+
+        vectors = np.asarray(vectors)
+        rng = np.random.default_rng(0)
+        centroids = vectors[rng.choice(count, self.ivf_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for list_id in range(self.ivf_lists):
+                members = vectors[assignment == list_id]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[list_id] = centroid / (np.linalg.norm(centroid) or 1)
+
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        return centroids, [np.flatnonzero(assignment == list_id) for list_id in range(self.ivf_lists)]
+
+    def search(self, queries: np.ndarray, k: int = 4) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k search for a batch of query vectors.
+
+        Args:
+            queries: Array of shape (n, dimension); rows need not be normalized.
+            k: Results per query.
+
+        Returns:
+            For each query, (row, cosine similarity) pairs in descending similarity.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        with self._lock:
+            return self._search(queries, k)
+
+    def _search(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        vectors, centroids, lists = self._vectors, self._centroids, self._lists
+        if vectors is None or not len(self._ids):
+            return [[] for _ in queries]
+
+        if centroids is None:
+            scores = queries @ np.asarray(vectors).T
+            return [_top_k(np.arange(scores.shape[1]), row, k) for row in scores]
+
+        results = []
+        probes = min(self.ivf_probes, len(lists))
+        nearest_lists = np.argpartition(-(queries @ centroids.T), probes - 1, axis=1)[:, :probes]
+        for query, list_ids in zip(queries, nearest_lists):
+            candidates = np.concatenate([lists[list_id] for list_id in list_ids])
+            results.append(_top_k(candidates, np.asarray(vectors[candidates]) @ query, k))
+        return results
+
+    def similarity_search_by_vector(self, vectors: np.ndarray, k: int = 4) -> List[List[Document]]:
+        """Return the k nearest chunks for each query vector, as LangChain Documents."""
+        with self._lock:
+            hits = self.search(vectors, k)
+            metadatas = [[dict(self._metadatas[row]) for row, _ in query_hits] for query_hits in hits]
+        return [
+            [Document(page_content=metadata.pop("text", ""), metadata=metadata) for metadata in batch]
+            for batch in metadatas
+        ]
+
+    def stats(self) -> Dict:
+        return {"vectors": len(self._ids), "ivf_lists": len(self._lists)}
+
+
+def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[best], scores[best]
+    order = np.argsort(-scores)
+    return [(int(rows[i]), float(scores[i])) for i in order]
+
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.text_utils import normalize_text
+
+# Size and lifetime of the shared answer verdict cache
+VERDICT_CACHE_SIZE = int(os.getenv('VERDICT_CACHE_SIZE', '50000'))
+VERDICT_CACHE_TTL = float(os.getenv('VERDICT_CACHE_TTL', '86400'))
+
+
+class VerdictCache:
+    """
+    Bounded LRU/TTL cache of answer verification verdicts.
+
+    Keys are the normalized (correct answer, user answer) pair, so the cache is shared
+    by every session and game that verifies answers against the same solution.
+    """
+
+    def __init__(self, max_size: int = VERDICT_CACHE_SIZE, ttl: float = VERDICT_CACHE_TTL):
+        """
+        Args:
+            max_size: Maximum number of verdicts kept; least recently used are evicted.
+            ttl: Seconds a verdict stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[bool, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(correct_answer: str, user_answer: str) -> Tuple[str, str]:
+        return normalize_text(correct_answer), normalize_text(user_answer)
+
+    def get(self, correct_answer: str, user_answer: str) -> Optional[bool]:
+        """
+        Look up a cached verdict.
+
+        Args:
+            correct_answer: The expected answer.
+            user_answer: The submitted answer.
+
+        Returns:
+            True/False if a fresh verdict is cached, otherwise None.
+        """
+        key = self._key(correct_answer, user_answer)
+        entry = self._entries.get(key)
+        if entry is not None:
+            verdict, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return verdict
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, correct_answer: str, user_answer: str, verdict: bool):
+        """Store a verdict, evicting the least recently used entries past ``max_size``."""
+        key = self._key(correct_answer, user_answer)
+        self._entries[key] = (verdict, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached verdict."""
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Shared by the riddle and quiz verification paths
+verdict_cache = VerdictCache()
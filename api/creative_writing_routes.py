@@ -2,13 +2,13 @@ import sys
 import logging
 from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
 # from pydantic import BaseModel, validator
-from typing import Optional, Dict, Literal
+from typing import Optional, Literal
 import os
 from datetime import datetime, timedelta
 import uuid
 from fastapi.middleware.cors import CORSMiddleware
 import json
-from typing import Dict, Optional, Tuple
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,7 +19,9 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 try:
+    from ai_engine import llm_client
     from ai_engine.creative_writing import InteractiveCreativeWriting
+    from ai_engine.session_store import SessionStore
 except ImportError:
     logger.error("Failed to import InteractiveCreativeWriting. Ensure the module is in the correct path.")
     raise
@@ -44,14 +46,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for challenges with TTL
-challenges: Dict[str, 'Challenge'] = {}
-
 # Initialize the InteractiveCreativeWriting system
 writing_system = InteractiveCreativeWriting()
 
 
 class Challenge:
+    __slots__ = (
+        "id",
+        "prompt",
+        "criteria",
+        "start_time",
+        "end_time",
+        "status",
+        "submission",
+        "evaluation",
+        "scores",
+    )
+
     def __init__(self, id: str, prompt: str, criteria: str, duration_minutes: int):
         self.id = id
         self.prompt = prompt
@@ -63,15 +74,13 @@ class Challenge:
         self.evaluation = None
         self.scores = None
 
-def cleanup_expired_challenges():
-    """Remove expired challenges from memory"""
-    current_time = datetime.now()
-    expired_ids = [
-        challenge_id for challenge_id, challenge in challenges.items()
-        if current_time > challenge.end_time + timedelta(minutes=1)  # Keep for 1 minutes after expiry
-    ]
-    for challenge_id in expired_ids:
-        del challenges[challenge_id]
+# Challenges live in the shared session backend and expire on their own
+challenges: SessionStore[Challenge] = SessionStore(Challenge, "challenge")
+
+async def save_challenge(challenge: Challenge):
+    """Store a challenge until 1 minute after its end time"""
+    remaining = challenge.end_time + timedelta(minutes=1) - datetime.now()
+    await challenges.asave(challenge.id, challenge, ttl=max(remaining.total_seconds(), 1.0))
 
 async def cleanup_temp_file(filepath: str):
     """Clean up temporary file"""
@@ -82,19 +91,13 @@ async def cleanup_temp_file(filepath: str):
         logger.error(f"Failed to cleanup temporary file {filepath}: {str(e)}")
 
 @app.post("/prompt")
-async def create_challenge(
-    challenge_create: ChallengeCreate,
-    background_tasks: BackgroundTasks
-):
+async def create_challenge(challenge_create: ChallengeCreate):
     """Create a new writing challenge with a specified duration."""
     try:
-        # Cleanup expired challenges
-        background_tasks.add_task(cleanup_expired_challenges)
-        
         # Convert duration to minutes
         duration_minutes = challenge_create.get_minutes()
         
-        prompt, criteria = writing_system.get_writing_prompt()
+        prompt, criteria = await writing_system.get_writing_prompt()
         
         challenge_id = str(uuid.uuid4())
         challenge = Challenge(
@@ -104,7 +107,7 @@ async def create_challenge(
             duration_minutes=duration_minutes
         )
         
-        challenges[challenge_id] = challenge
+        await save_challenge(challenge)
         
         return {
             "id": challenge_id,
@@ -129,16 +132,16 @@ async def evaluate_challenge(
     pdf_file: UploadFile = File(...)
 ):
     """Submit and evaluate a challenge submission."""
-    if challenge_id not in challenges:
+    challenge = await challenges.aget(challenge_id)
+    if challenge is None:
         raise HTTPException(status_code=404, detail="Challenge not found")
     
-    challenge = challenges[challenge_id]
-    
     if challenge.status != 'active':
         raise HTTPException(status_code=400, detail="Challenge is not active")
     
     if datetime.now() > challenge.end_time:
         challenge.status = 'expired'
+        await save_challenge(challenge)
         raise HTTPException(status_code=400, detail="Challenge has expired")
     
     # Validate file type
@@ -154,16 +157,17 @@ async def evaluate_challenge(
             buffer.write(content)
         
         # Extract text using existing method
-        submission_text = writing_system.extract_text_from_pdf(temp_path)
+        submission_text = await llm_client.run_blocking(writing_system.extract_text_from_pdf, temp_path)
         
         if not submission_text:
             raise HTTPException(status_code=400, detail="Failed to extract text from PDF")
         
         # Store submission and evaluate
         challenge.submission = submission_text
-        challenge.evaluation = writing_system.evaluate_submission(submission_text)
-        challenge.scores = json.loads(writing_system.get_json_scores(challenge.evaluation))
+        challenge.evaluation = await writing_system.evaluate_submission(submission_text)
+        challenge.scores = json.loads(await writing_system.get_json_scores(challenge.evaluation))
         challenge.status = 'completed'
+        await save_challenge(challenge)
         
         return {
             "message": "Submission evaluated successfully",
@@ -173,6 +177,7 @@ async def evaluate_challenge(
     except Exception as e:
         logger.error(f"Error evaluating submission: {str(e)}")
         challenge.status = 'failed'
+        await save_challenge(challenge)
         raise HTTPException(status_code=500, detail="Failed to evaluate submission")
     
     finally:
@@ -182,11 +187,10 @@ async def evaluate_challenge(
 @app.get("/scores/{challenge_id}")
 async def get_challenge_scores(challenge_id: str):
     """Get the scores for a completed challenge."""
-    if challenge_id not in challenges:
+    challenge = await challenges.aget(challenge_id)
+    if challenge is None:
         raise HTTPException(status_code=404, detail="Challenge not found")
     
-    challenge = challenges[challenge_id]
-    
     if challenge.status != 'completed':
         raise HTTPException(status_code=400, detail="Challenge evaluation not completed")
     
@@ -198,14 +202,14 @@ async def get_challenge_scores(challenge_id: str):
 @app.get("/challenge/{challenge_id}")
 async def get_challenge_status(challenge_id: str):
     """Get the current status of a challenge."""
-    if challenge_id not in challenges:
+    challenge = await challenges.aget(challenge_id)
+    if challenge is None:
         raise HTTPException(status_code=404, detail="Challenge not found")
     
-    challenge = challenges[challenge_id]
-    
     # Update status if expired
     if challenge.status == 'active' and datetime.now() > challenge.end_time:
         challenge.status = 'expired'
+        await save_challenge(challenge)
     
     return {
         "id": challenge.id,
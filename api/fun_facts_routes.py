@@ -58,7 +58,7 @@ fun_facts_generator = BNBFunFacts()
 @app.get("/random-fact", response_model=FunFactResponse)
 async def get_random_fact():
     """Generate a random fun fact about a random topic"""
-    result = fun_facts_generator.generate_fun_facts()
+    result = await fun_facts_generator.generate_fun_facts()
 
     # Remove Markdown fomating
     result['facts'] = md.remove_markdown(result['facts'])
@@ -1,14 +1,16 @@
 import sys
 import os
 import logging
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai_engine.quiz_handler import BlockchainQuizGame
+from ai_engine.quiz_handler import BlockchainQuizGame, question_pool
+from ai_engine.session_store import SessionStore
+from api.sessions import load_game, save_game
 from model.models import QuizQuestionResponse, AnswerCheckResponse, BreakOptionsResponse, ResetResponse
 from model.models import AnswerRequestQuiz as AnswerRequest
 
@@ -35,19 +37,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create a global game instance
-game = BlockchainQuizGame()
+# Per-player game state, addressed by the X-Session-ID header or session cookie
+# (or carried by the client as an X-Game-State token when SESSION_MODE=token)
+sessions = SessionStore(BlockchainQuizGame, "quiz")
+
+@app.on_event("startup")
+async def start_question_pool():
+    """Load the persisted question pool and start refilling it in the background."""
+    await question_pool.start()
+    logger.info(f"Quiz question pool started: {question_pool.stats()['sizes']}")
+
+@app.on_event("shutdown")
+async def stop_question_pool():
+    """Stop the refill tasks and save the question pool to disk."""
+    await question_pool.stop()
+    logger.info("Quiz question pool saved")
 
 @app.post("/quiz/question", response_model=QuizQuestionResponse)
-async def get_quiz_question():
+async def get_quiz_question(request: Request, http_response: Response):
     """
-    Generate a new quiz question.
+    Generate a new quiz question for the caller's session.
     
     Returns:
         QuizQuestionResponse: A quiz question with options, hint, and complexity level
     """
     try:
-        response = game.generate_quiz_question()
+        session_id, game = await load_game(sessions, request)
+        game = game or BlockchainQuizGame()
+
+        response = await game.generate_quiz_question()
+        response['state_token'] = await save_game(sessions, http_response, session_id, game)
         
         # Ensure options are properly formatted as a list
         if isinstance(response['options'], str):
@@ -62,9 +81,9 @@ async def get_quiz_question():
         )
 
 @app.post("/quiz/answer", response_model=AnswerCheckResponse)
-async def check_answer(answer_request: AnswerRequest):
+async def check_answer(answer_request: AnswerRequest, request: Request, http_response: Response):
     """
-    Check the user's answer to the current quiz question.
+    Check the user's answer to their session's current quiz question.
     
     Args:
         answer_request (AnswerRequest): The answer submission
@@ -73,13 +92,15 @@ async def check_answer(answer_request: AnswerRequest):
         AnswerCheckResponse: Feedback on the answer (correct/incorrect)
     """
     try:
-        if not game.current_answer:
+        session_id, game = await load_game(sessions, request)
+        if game is None or not game.current_answer:
             raise HTTPException(
                 status_code=400,
                 detail="No active question. Please get a new question first."
             )
         
-        response = game.check_answer(answer_request.answer)
+        response = await game.check_answer(answer_request.answer)
+        response['state_token'] = await save_game(sessions, http_response, session_id, game)
         return AnswerCheckResponse(**response)
     except HTTPException as he:
         raise he
@@ -99,7 +120,7 @@ async def get_break_options():
         BreakOptionsResponse: Suggested alternative activities
     """
     try:
-        break_options = game.generate_break_options()
+        break_options = await BlockchainQuizGame().generate_break_options()
         # Convert string response to list if necessary
         if isinstance(break_options, str):
             options_list = [opt.strip() for opt in break_options.split('\n') if opt.strip()]
@@ -115,18 +136,18 @@ async def get_break_options():
         )
 
 @app.post("/quiz/reset", response_model=ResetResponse)
-async def reset_game():
+async def reset_game(request: Request, http_response: Response):
     """
-    Reset the game to its initial state.
+    Reset the caller's game to its initial state.
     
     Returns:
         ResetResponse: A success message and status
     """
-    global game
     try:
-        game = BlockchainQuizGame()
+        session_id, _ = await load_game(sessions, request)
+        state_token = await save_game(sessions, http_response, session_id, BlockchainQuizGame())
         logger.info("Game reset successfully")
-        return ResetResponse(message="Game reset successfully", status=True)
+        return ResetResponse(message="Game reset successfully", status=True, state_token=state_token)
     except Exception as e:
         logger.error(f"Error resetting game: {e}")
         raise HTTPException(
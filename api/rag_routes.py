@@ -1,9 +1,13 @@
 import os
 import sys
+import json
+import asyncio
 import logging
+import secrets
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -19,19 +23,26 @@ logger = logging.getLogger(__name__)
 
 # Import the existing ConversationalModel
 try:
-    from ai_engine.rag import ConversationalModel
+    from ai_engine import context_packer, llm_client
+    from ai_engine.rag import ConversationalModel, ConversationHistory, PDF_PATHS, RAG_HISTORY_WINDOW, URLS
+    from ai_engine.retrieval_cache import query_embeddings, retrieval_cache
+    from ai_engine.semantic_cache import answer_cache
+    from ai_engine.text_utils import normalize_text
+    from ai_engine.session_store import SessionStore, new_session_id
+    from ai_engine.storage import MemoryBackend, get_backend
+    from api.sessions import get_session_id, set_session_id
 except ImportError:
     logger.error("Failed to import ConversationalModel. Ensure the module is in the correct path.")
     raise
 
 try:
-    from model.models import QueryRequest
+    from model.models import BatchQueryRequest, QueryRequest
 except ImportError:
     logger.error("Failed to import QueryRequest. Ensure the models module is available.")
     raise
 
 try:
-    from markdown_converter.markdown_converter import MarkdownConverter as md
+    from markdown_converter.markdown_converter import MarkdownConverter as md, MarkdownStreamConverter
 except ImportError:
     logger.error("Failed to import MarkdownConverter. Ensure the module is in the correct path.")
     raise
@@ -56,28 +67,99 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Predefined document paths
-PDF_PATHS = [
-   # r"C:\Users\Okeoma\Downloads\whitepaper_Prompt Engineering_v4.pdf",
-]
-
-URLS = [
-    "https://questbot.gitbook.io/questbot",
-    "https://questbot.gitbook.io/questbot/introduction-what-is-questbot",
-    "https://questbot.gitbook.io/questbot/why-questbot",
-    "https://questbot.gitbook.io/questbot/core-features",
-    "https://questbot.gitbook.io/questbot/how-questbot-works",
-    "https://questbot.gitbook.io/questbot/integration-details",
-    "https://questbot.gitbook.io/questbot/aligning-with-hackathon-tracks",
-    "https://questbot.gitbook.io/questbot/impact-potential",
-    "https://questbot.gitbook.io/questbot/impact-potential",
-    "https://questbot.gitbook.io/questbot/faqs"
-        ]
-
 # Global variables
 global_model = None
 qa_chain = None
 
+# Seconds of inactivity after which a conversation is forgotten
+RAG_HISTORY_TTL = float(os.getenv('RAG_HISTORY_TTL', '1800'))
+
+# Maximum conversations kept in process memory, and their approximate total size in
+# megabytes; least recently used are evicted when either is exceeded
+RAG_MAX_CONVERSATIONS = int(os.getenv('RAG_MAX_CONVERSATIONS', '10000'))
+RAG_CONVERSATIONS_MAX_MB = float(os.getenv('RAG_CONVERSATIONS_MAX_MB', '256'))
+
+# Maximum questions per /query/batch request, and answers generated at once for one batch
+RAG_BATCH_MAX_QUERIES = int(os.getenv('RAG_BATCH_MAX_QUERIES', '50'))
+RAG_BATCH_CONCURRENCY = int(os.getenv('RAG_BATCH_CONCURRENCY', '8'))
+
+# Token required in the X-Admin-Token header by admin endpoints; they are disabled when unset
+RAG_ADMIN_TOKEN = os.getenv('RAG_ADMIN_TOKEN')
+
+# Chat history per conversation. With the in-memory backend conversations get their
+# own LRU so they cannot crowd out game sessions; shared backends expire them by TTL.
+_conversation_backend = get_backend()
+if isinstance(_conversation_backend, MemoryBackend):
+    _conversation_backend = MemoryBackend(
+        capacity=RAG_MAX_CONVERSATIONS,
+        max_bytes=int(RAG_CONVERSATIONS_MAX_MB * 1024 * 1024),
+        sizeof=ConversationHistory.approximate_size
+    )
+conversations = SessionStore(ConversationHistory, "rag", backend=_conversation_backend, idle_ttl=RAG_HISTORY_TTL)
+
+# Conversations whose summary is being refreshed, and the tasks doing it
+_summarizing = set()
+_summary_tasks = set()
+
+async def summarize_conversation(key: str):
+    """Fold a conversation's messages that left the window into its running summary."""
+    try:
+        history = await conversations.aget(key)
+        # Messages that leave the window while a summary is generated are folded in the next round
+        while history is not None and history.unsummarized:
+            folded, folded_until = history.pending_summary()
+            summary = await global_model.summarize_history(history.summary, folded)
+
+            # Reload: the conversation may have moved on while the summary was generated
+            history = await conversations.aget(key)
+            if history is not None:
+                history.fold_summary(summary, folded_until)
+                await conversations.asave(key, history)
+    except Exception as e:
+        logger.error(f"Error summarizing conversation: {str(e)}")
+    finally:
+        _summarizing.discard(key)
+
+def schedule_summary(key: str, history: ConversationHistory):
+    """Refresh the conversation summary in the background, off the request path."""
+    if history.unsummarized and key not in _summarizing:
+        _summarizing.add(key)
+        task = asyncio.create_task(summarize_conversation(key))
+        _summary_tasks.add(task)
+        task.add_done_callback(_summary_tasks.discard)
+
+async def record_exchange(key: str, history: ConversationHistory, query: str, response: str):
+    """
+    Add a question and its answer to a conversation and save it.
+
+    The conversation is reloaded first and the exchange applied to the stored copy,
+    so a summary or another exchange saved while the answer was generated is kept.
+    ``history`` (as loaded for the request) is used only if the stored one expired.
+    """
+    history = await conversations.aget(key) or history
+    history.add_user_message(query)
+    history.add_ai_message(response)
+    await conversations.asave(key, history)
+    schedule_summary(key, history)
+
+def conversation_key(session_id: str, conversation_id: Optional[str]) -> str:
+    """Key of a conversation: the session itself, or one of several named conversations within it."""
+    return f"{session_id}:{conversation_id}" if conversation_id else session_id
+
+async def load_conversation(request: QueryRequest, http_request: Request):
+    """
+    Return the caller's session id, conversation key and history (new if unknown or expired).
+    """
+    session_id = get_session_id(http_request) or new_session_id()
+    key = conversation_key(session_id, request.conversation_id)
+    return session_id, key, await conversations.aget(key) or ConversationHistory()
+
+def swap_qa_chain(new_chain):
+    """Serve a newly published index version; queries already running finish on the old one."""
+    global qa_chain
+    qa_chain = new_chain
+    logger.info(f"Now serving index version {global_model.version}")
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the model on application startup."""
@@ -95,16 +177,45 @@ async def startup_event():
             urls=URLS
         )
 
-        # Run model initialization and store QA chain
-        qa_chain = global_model.run()
+        # Attach to the published index version; ingestion runs offline (python -m ai_engine.ingest)
+        qa_chain = global_model.attach()
+        if qa_chain is None:
+            # Only one process builds at a time; the others attach once it publishes
+            logger.warning("No index version published yet; building one in the background unless another process is")
+            global_model.start_rebuild(on_swap=swap_qa_chain)
+        # Switch to versions published by the ingestion command or other workers
+        global_model.start_version_watch(on_swap=swap_qa_chain)
+        global_model.start_background_refresh(on_swap=swap_qa_chain)
 
-        logger.info(f"Model initialized successfully with {len(PDF_PATHS)} PDF(s) and {len(URLS)} URL(s)")
+        logger.info(f"Model initialized with index version {global_model.version}")
     except Exception as e:
         logger.error(f"Failed to initialize model: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Model initialization failed: {str(e)}")
 
+async def lookup_cached_answer(query: str, history: ConversationHistory):
+    """
+    Look up an answer to a paraphrase of ``query`` in the semantic answer cache.
+
+    Only questions without conversation context are eligible.
+
+    Returns:
+        Tuple of (cached answer or None, query embedding or None, cache generation).
+    """
+    generation = answer_cache.generation
+    if history.messages:
+        return None, None, generation
+
+    response = answer_cache.get_exact(query)
+    query_vector = None
+    if response is None:
+        query_vector = await llm_client.run_blocking(global_model.embed_query, query)
+        response, _ = answer_cache.get(query_vector)
+    if response is not None:
+        logger.info(f"Answered query from semantic cache: {query}")
+    return response, query_vector, generation
+
 @app.post("/query")
-async def process_query(request: QueryRequest):
+async def process_query(request: QueryRequest, http_request: Request, http_response: Response):
     """Process a query using the initialized conversational AI model."""
     global global_model, qa_chain
 
@@ -113,18 +224,28 @@ async def process_query(request: QueryRequest):
         raise HTTPException(status_code=500, detail="Model not initialized")
 
     try:
-        # Add query to memory
-        global_model.memory.chat_memory.add_user_message(request.query)
-        
-        # Process query using the QA chain
-        logger.info(f"Processing query: {request.query}")
-        response = qa_chain.invoke(request.query)
-        
-        # Convert markdown to plain text
-        response = md.remove_markdown(response)
-        
-        # Add response to memory
-        global_model.memory.chat_memory.add_ai_message(response)
+        session_id, key, history = await load_conversation(request, http_request)
+        set_session_id(http_response, session_id)
+
+        # Questions without conversation context can reuse answers to paraphrases
+        response, query_vector, generation = await lookup_cached_answer(request.query, history)
+
+        if response is None:
+            # Process query using the QA chain
+            logger.info(f"Processing query: {request.query}")
+            response = await llm_client.ainvoke(
+                qa_chain,
+                {"question": request.query, "chat_history": history.format()}
+            )
+
+            # Convert markdown to plain text
+            response = md.remove_markdown(response)
+
+            if query_vector is not None:
+                answer_cache.put(request.query, query_vector, response, generation)
+
+        # Add the exchange to memory
+        await record_exchange(key, history, request.query, response)
         
         logger.info("Query processed successfully")
         return {"response": response}
@@ -133,6 +254,162 @@ async def process_query(request: QueryRequest):
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/query/stream")
+async def process_query_stream(request: QueryRequest, http_request: Request):
+    """
+    Stream the answer to a query as Server-Sent Events.
+
+    Emits ``token`` events carrying plain-text pieces as the model generates them,
+    then a ``done`` event with the full response. Conversation memory is updated
+    only after the stream completes.
+    """
+    global global_model, qa_chain
+
+    if global_model is None or qa_chain is None:
+        logger.error("Model or QA chain not initialized")
+        raise HTTPException(status_code=500, detail="Model not initialized")
+
+    session_id, key, history = await load_conversation(request, http_request)
+
+    async def event_stream():
+        try:
+            response, query_vector, generation = await lookup_cached_answer(request.query, history)
+            if response is not None:
+                yield _sse("token", {"text": response})
+            else:
+                logger.info(f"Streaming query: {request.query}")
+                converter = MarkdownStreamConverter()
+                pieces = []
+                async for chunk in llm_client.astream(
+                    qa_chain,
+                    {"question": request.query, "chat_history": history.format()}
+                ):
+                    text = converter.feed(chunk)
+                    if text:
+                        pieces.append(text)
+                        yield _sse("token", {"text": text})
+                text = converter.flush()
+                if text:
+                    pieces.append(text)
+                    yield _sse("token", {"text": text})
+                response = "".join(pieces)
+
+                if query_vector is not None:
+                    answer_cache.put(request.query, query_vector, response, generation)
+
+            # Add the exchange to memory
+            await record_exchange(key, history, request.query, response)
+
+            logger.info("Streamed query processed successfully")
+            yield _sse("done", {"response": response})
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield _sse("error", {"detail": f"Error processing query: {str(e)}"})
+
+    streaming_response = StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    set_session_id(streaming_response, session_id)
+    return streaming_response
+
+@app.post("/query/batch")
+async def process_query_batch(request: BatchQueryRequest):
+    """
+    Answer several independent questions in one request.
+
+    Questions are answered without conversation history. Repeats are answered
+    once; the rest are embedded in a single request, served from the semantic
+    answer cache where possible, retrieved together, and generated with at most
+    RAG_BATCH_CONCURRENCY answers in flight. A failed question does not fail the
+    batch: its result carries an ``error`` instead of a ``response``.
+    """
+    global global_model, qa_chain
+
+    if global_model is None or qa_chain is None:
+        logger.error("Model or QA chain not initialized")
+        raise HTTPException(status_code=500, detail="Model not initialized")
+    if len(request.queries) > RAG_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {RAG_BATCH_MAX_QUERIES} queries per batch")
+
+    chain = qa_chain
+    generation = answer_cache.generation
+    # One question per distinct query (after normalization), in order of first appearance
+    first = {}
+    for query in request.queries:
+        first.setdefault(normalize_text(query), query)
+    questions = list(first.values())
+
+    answers = {question: answer_cache.get_exact(question) for question in questions}
+    pending = [question for question in questions if answers[question] is None]
+    vectors = {}
+    if pending:
+        try:
+            embedded = await llm_client.run_blocking(global_model.embed_queries, pending)
+            vectors = dict(zip(pending, embedded))
+            for question in pending:
+                answers[question], _ = answer_cache.get(vectors[question])
+            pending = [question for question in pending if answers[question] is None]
+            await llm_client.run_blocking(
+                global_model.prefetch_retrieval, pending, [vectors[question] for question in pending]
+            )
+        except Exception as e:
+            # Each question falls back to the chain's own embedding and retrieval
+            logger.warning(f"Batch embedding or retrieval failed, retrieving per question: {str(e)}")
+
+    semaphore = asyncio.Semaphore(max(1, RAG_BATCH_CONCURRENCY))
+
+    async def answer(question: str):
+        async with semaphore:
+            response = await llm_client.ainvoke(chain, {"question": question, "chat_history": ""})
+        response = md.remove_markdown(response)
+        if question in vectors:
+            answer_cache.put(question, vectors[question], response, generation)
+        return response
+
+    outcomes = await asyncio.gather(*(answer(question) for question in pending), return_exceptions=True)
+    errors = {}
+    for question, outcome in zip(pending, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error processing batch query: {str(outcome)}")
+            errors[question] = f"Error processing query: {str(outcome)}"
+        else:
+            answers[question] = outcome
+
+    results = []
+    for query in request.queries:
+        question = first[normalize_text(query)]
+        if question in errors:
+            results.append({"query": query, "error": errors[question]})
+        else:
+            results.append({"query": query, "response": answers[question]})
+
+    logger.info(f"Batch of {len(request.queries)} queries processed, {len(errors)} failed")
+    return {"results": results}
+
+@app.post("/admin/rebuild")
+async def rebuild_index(http_request: Request, http_response: Response, force: bool = False):
+    """
+    Build a new index version in the background and serve it once it is complete.
+
+    Requires the ``X-Admin-Token`` header to match ``RAG_ADMIN_TOKEN``. Answers 202
+    when a rebuild was started and 409 when one is already running.
+    """
+    token = http_request.headers.get("X-Admin-Token", "")
+    if not RAG_ADMIN_TOKEN or not secrets.compare_digest(token, RAG_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if global_model is None:
+        raise HTTPException(status_code=500, detail="Model not initialized")
+
+    started = global_model.start_rebuild(force=force, on_swap=swap_qa_chain)
+    http_response.status_code = 202 if started else 409
+    return {"started": started, "version": global_model.version, "rebuild": global_model.rebuild_status}
+
 @app.get("/health")
 async def health_check():
     """Simple health check endpoint to verify API is running."""
@@ -141,7 +418,24 @@ async def health_check():
     return {
         "status": status,
         "pdf_paths": PDF_PATHS,
-        "urls": URLS
+        "urls": URLS,
+        "ingestion": global_model.ingest_stats if global_model is not None else None,
+        "index": {
+            **global_model.versions.stats(),
+            "serving": global_model.version,
+            "rebuild": global_model.rebuild_status
+        } if global_model is not None else None,
+        "sources": global_model.load_report if global_model is not None else None,
+        "conversations": {
+            **(await conversations.astats()),
+            "window": RAG_HISTORY_WINDOW,
+            "ttl": RAG_HISTORY_TTL,
+            "backend": _conversation_backend.stats()
+        },
+        "context_packer": context_packer.stats(),
+        "answer_cache": answer_cache.stats(),
+        "retrieval_cache": retrieval_cache.stats(),
+        "query_embeddings": query_embeddings.stats()
     }
 
 if __name__ == "__main__":
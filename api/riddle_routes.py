@@ -2,7 +2,7 @@ import os
 import sys
 import logging
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -11,7 +11,9 @@ from pydantic import BaseModel
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the existing RiddleGame logic
-from ai_engine.riddle_generation import RiddleGame
+from ai_engine.riddle_generation import RiddleGame, riddle_pool
+from ai_engine.session_store import SessionStore
+from api.sessions import load_game, save_game
 from model.models import AnswerRequestRiddle as AnswerRequest
 
 # Configure logging
@@ -35,34 +37,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global game instance
-game = RiddleGame()
+# Per-player game state, addressed by the X-Session-ID header or session cookie
+# (or carried by the client as an X-Game-State token when SESSION_MODE=token)
+sessions = SessionStore(RiddleGame, "riddle")
+
+@app.on_event("startup")
+async def start_riddle_pool():
+    """Load the persisted riddle buffer and start refilling it in the background."""
+    await riddle_pool.start()
+    logger.info(f"Riddle buffer started: {riddle_pool.stats()['sizes']}")
+
+@app.on_event("shutdown")
+async def stop_riddle_pool():
+    """Stop the refill tasks and save the riddle buffer to disk."""
+    await riddle_pool.stop()
+    logger.info("Riddle buffer saved")
 
 @app.get("/riddle")
-async def generate_riddle():
-    """Generate a new riddle"""
+async def generate_riddle(request: Request, http_response: Response):
+    """Generate a new riddle for the caller's session"""
     try:
-        response = game.generate_riddle()
+        session_id, game = await load_game(sessions, request)
+        game = game or RiddleGame()
+
+        response = await game.generate_riddle()
 
         if not response or "error" in response:
             logger.error("Error generating riddle: %s", response.get("error", "Unknown error"))
             raise HTTPException(status_code=500, detail=response.get("error", "Failed to generate riddle"))
 
+        state_token = await save_game(sessions, http_response, session_id, game)
         return {
             "riddle": response.get("riddle"),
             "hint": response.get("hint"),
             "complexity": response.get("complexity"),
-            "attempts_remaining": response.get("attempts_remaining")
+            "attempts_remaining": response.get("attempts_remaining"),
+            "state_token": state_token
         }
     except Exception as e:
         logger.exception("Unexpected error during riddle generation")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 @app.post("/check-answer")
-async def check_riddle_answer(answer_request: AnswerRequest):
-    """Check the user's answer for the current riddle"""
+async def check_riddle_answer(answer_request: AnswerRequest, request: Request, http_response: Response):
+    """Check the user's answer for their session's current riddle"""
     try:
-        result = game.check_answer(answer_request.user_answer)
+        session_id, game = await load_game(sessions, request)
+        if game is None:
+            # Unknown sessions (or invalid tokens) get a fresh game, which reports "No active riddle"
+            return await RiddleGame().check_answer(answer_request.user_answer)
+
+        result = await game.check_answer(answer_request.user_answer)
+        result["state_token"] = await save_game(sessions, http_response, session_id, game)
         return result
     except Exception as e:
         logger.exception("Unexpected error during answer checking")
@@ -72,25 +98,25 @@ async def check_riddle_answer(answer_request: AnswerRequest):
 async def get_break_options():
     """Get alternative activity options"""
     try:
-        options = game.generate_break_options()
+        options = await RiddleGame().generate_break_options()
         return {"break_options": options}
     except Exception as e:
         logger.exception("Unexpected error during break options generation")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 @app.post("/quiz/reset")
-async def reset_game():
+async def reset_game(request: Request, http_response: Response):
     """
-    Reset the game to its initial state.
+    Reset the caller's game to its initial state.
     
     Returns:
     - A success message
     """
-    global game
     try:
-        game = RiddleGame()
+        session_id, _ = await load_game(sessions, request)
+        state_token = await save_game(sessions, http_response, session_id, RiddleGame())
         logger.info("Game reset successfully.")
-        return {"message": "Game reset successfully"}
+        return {"message": "Game reset successfully", "state_token": state_token}
     except Exception as e:
         logger.error(f"Error resetting game: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,89 @@
+import os
+import re
+from typing import Optional, Tuple, TypeVar
+from fastapi import Request, Response
+
+from ai_engine.session_store import SessionStore, new_session_id
+
+# "server": state kept in the session backend, addressed by session id.
+# "token": state travels with the client as an encrypted X-Game-State token.
+SESSION_MODE = os.getenv('SESSION_MODE', 'server').lower()
+
+# Clients address their session with this header, or the cookie set on first contact
+SESSION_HEADER = "X-Session-ID"
+SESSION_COOKIE = "questbot_session"
+
+# Header carrying the game-state token in token mode (requests and responses)
+STATE_HEADER = "X-Game-State"
+
+_VALID_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+# Imported at startup so token mode without STATE_TOKEN_SECRET fails to start, not on the first request
+if SESSION_MODE == "token":
+    from ai_engine.state_token import decode_state, encode_state
+
+T = TypeVar('T')
+
+
+def get_session_id(request: Request) -> Optional[str]:
+    """
+    Read the session id from the request header or cookie.
+
+    Args:
+        request: The incoming request.
+
+    Returns:
+        The session id, or None if absent or malformed.
+    """
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    if session_id and _VALID_SESSION_ID.match(session_id):
+        return session_id
+    return None
+
+
+def set_session_id(response: Response, session_id: str):
+    """Echo the session id back as both a header and a cookie."""
+    response.headers[SESSION_HEADER] = session_id
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+
+
+async def load_game(store: SessionStore[T], request: Request) -> Tuple[Optional[str], Optional[T]]:
+    """
+    Load the caller's game state in the configured session mode.
+
+    Args:
+        store: The server-side store for this game.
+        request: The incoming request.
+
+    Returns:
+        Tuple of (session id or None, state or None if the caller has no valid state).
+    """
+    if SESSION_MODE == "token":
+        return None, decode_state(request.headers.get(STATE_HEADER), store.state_class, store.namespace)
+
+    session_id = get_session_id(request)
+    return session_id, await store.aget(session_id)
+
+
+async def save_game(store: SessionStore[T], response: Response, session_id: Optional[str], state: T) -> Optional[str]:
+    """
+    Persist the caller's game state in the configured session mode.
+
+    Args:
+        store: The server-side store for this game.
+        response: The outgoing response, used to return the session id or token.
+        session_id: The caller's session id, if any.
+        state: The state to persist.
+
+    Returns:
+        The new game-state token in token mode, otherwise None.
+    """
+    if SESSION_MODE == "token":
+        token = encode_state(state, store.namespace)
+        response.headers[STATE_HEADER] = token
+        return token
+
+    session_id = session_id or new_session_id()
+    await store.asave(session_id, state)
+    set_session_id(response, session_id)
+    return None
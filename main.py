@@ -9,14 +9,20 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import route modules
 from api.quiz_routes import (
-    game as quiz_game,
+    sessions as quiz_sessions,
+    question_pool,
+    start_question_pool,
+    stop_question_pool,
     get_quiz_question,
     check_answer,
     get_break_options as quiz_break_options,
     reset_game as reset_quiz
 )
 from api.riddle_routes import (
-    game as riddle_game,
+    sessions as riddle_sessions,
+    riddle_pool,
+    start_riddle_pool,
+    stop_riddle_pool,
     generate_riddle,
     check_riddle_answer,
     get_break_options as riddle_break_options,
@@ -25,6 +31,9 @@ from api.riddle_routes import (
 from api.rag_routes import (
     startup_event,
     process_query,
+    process_query_stream,
+    process_query_batch,
+    rebuild_index,
     health_check
 )
 
@@ -39,6 +48,10 @@ from api.creative_writing_routes import (
     get_challenge_status
 )
 
+from ai_engine import llm_client
+from ai_engine.storage import get_backend
+from ai_engine.verdict_cache import verdict_cache
+
 
 # Configure logging
 logging.basicConfig(
@@ -61,11 +74,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Session-ID", "X-Game-State"],
 )
 
 # Register startup event from RAG routes
 app.add_event_handler("startup", startup_event)
 
+# Keep pre-generated quiz questions and riddles warm, and persist them on shutdown
+app.add_event_handler("startup", start_question_pool)
+app.add_event_handler("shutdown", stop_question_pool)
+app.add_event_handler("startup", start_riddle_pool)
+app.add_event_handler("shutdown", stop_riddle_pool)
+
 # Quiz routes
 app.post("/quiz/question")(get_quiz_question)
 app.post("/quiz/answer")(check_answer)
@@ -80,6 +100,9 @@ app.post("/riddle/reset")(reset_riddle)
 
 # RAG routes
 app.post("/rag/query")(process_query)
+app.post("/rag/query/stream")(process_query_stream)
+app.post("/rag/query/batch")(process_query_batch)
+app.post("/rag/admin/rebuild")(rebuild_index)
 app.get("/rag/health")(health_check)
 
 # Fun facts route
@@ -103,10 +126,21 @@ async def combined_health_check():
             "status": "healthy",
             "components": {
                 "rag": rag_health,
-                "quiz": "active" if quiz_game is not None else "inactive",
-                "riddle": "active" if riddle_game is not None else "inactive",
+                "quiz": "active" if quiz_sessions is not None else "inactive",
+                "riddle": "active" if riddle_sessions is not None else "inactive",
                 'fun_facts': 'active' if get_random_fact is not None else 'inactive',
                 'creative_writing': 'active' if create_challenge is not None else 'inactive'
+            },
+            "llm_client": llm_client.stats(),
+            "verdict_cache": verdict_cache.stats(),
+            "storage": get_backend().stats(),
+            "sessions": {
+                "quiz": await quiz_sessions.astats(),
+                "riddle": await riddle_sessions.astats()
+            },
+            "pools": {
+                "quiz": question_pool.stats(),
+                "riddle": riddle_pool.stats()
             }
         }
     except Exception as e:
@@ -48,4 +48,117 @@ class MarkdownConverter:
         text = re.sub(r'\n\s*\n', '\n\n', text)
         text = text.strip()
         
-        return text
\ No newline at end of file
+        return text
+
+class MarkdownStreamConverter:
+    """
+    Incremental counterpart of ``MarkdownConverter.remove_markdown`` for streamed text.
+
+    Text is fed in arbitrary chunks. Line prefixes (headers, bullets, numbers,
+    blockquotes) are removed once the start of a line is known, code fences and
+    horizontal rules are dropped, and inline formatting is removed from words as
+    soon as their markers are balanced, so plain text is emitted with at most a
+    word of delay.
+    """
+
+    _LINE_PREFIX = re.compile(r'^\s*(?:#+\s+|[-*+]\s+|\d+\.\s+|>\s+)')
+    _HORIZONTAL_RULE = re.compile(r'^\s*[-*_]{3,}\s*$')
+
+    def __init__(self):
+        self._buffer = ""
+        self._line_open = False
+        self._in_code = False
+        self._pending_newlines = 0
+        self._started = False
+
+    @staticmethod
+    def _strip_inline(text: str) -> str:
+        text = re.sub(r'\*{1,2}(.*?)\*{1,2}', r'\1', text)
+        text = re.sub(r'`([^`]+)`', r'\1', text)
+        return re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
+
+    def _emit(self, text: str) -> str:
+        if not text:
+            return ""
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+            self._pending_newlines = 0
+        prefix = "\n" * min(self._pending_newlines, 2)
+        self._pending_newlines = 0
+        return prefix + text
+
+    def _open_line(self, final: bool) -> bool:
+        """Strip the current line's prefix once enough of it has arrived to know it."""
+        if self._line_open:
+            return True
+        stripped = self._buffer.lstrip()
+        if stripped.startswith("```") or self._HORIZONTAL_RULE.match(self._buffer):
+            return False
+        if not final and not re.match(r'^\s*\S+\s+\S', self._buffer):
+            return False
+        self._buffer = self._LINE_PREFIX.sub('', self._buffer, count=1)
+        self._line_open = True
+        return True
+
+    def _end_line(self) -> str:
+        line, self._buffer = self._buffer, ""
+        was_open, self._line_open = self._line_open, False
+
+        if not was_open and line.lstrip().startswith("```"):
+            self._in_code = not self._in_code
+            return ""
+        if self._in_code:
+            output = self._emit(line)
+        elif not was_open and self._HORIZONTAL_RULE.match(line):
+            output = ""
+        else:
+            if not was_open:
+                line = self._LINE_PREFIX.sub('', line, count=1)
+            output = self._emit(self._strip_inline(line).rstrip())
+        if self._started:
+            self._pending_newlines += 1
+        return output
+
+    def _safe_prefix(self) -> str:
+        """Take the part of the open line that ends on a word boundary with balanced markers."""
+        cut = max(self._buffer.rfind(" "), self._buffer.rfind("\t"))
+        if cut <= 0:
+            return ""
+        candidate = self._buffer[:cut]
+        if candidate.count("`") % 2 or candidate.count("*") % 2:
+            return ""
+        if candidate.rfind("[") > candidate.rfind(")"):
+            candidate = candidate[:candidate.rfind("[")]
+        self._buffer = self._buffer[len(candidate):]
+        return candidate
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add streamed text and return whatever plain text can already be emitted.
+
+        Args:
+            chunk: The next piece of the markdown response.
+
+        Returns:
+            Plain text ready to send (possibly empty).
+        """
+        self._buffer += chunk or ""
+        output = []
+        while "\n" in self._buffer:
+            line, rest = self._buffer.split("\n", 1)
+            self._buffer = line
+            output.append(self._end_line())
+            self._buffer = rest
+
+        if self._buffer and not self._in_code and self._open_line(final=False):
+            output.append(self._emit(self._strip_inline(self._safe_prefix())))
+        return "".join(output)
+
+    def flush(self) -> str:
+        """Return the remaining text once the stream has ended."""
+        output = self._end_line() if self._buffer else ""
+        self._pending_newlines = 0
+        return output
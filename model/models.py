@@ -1,3 +1,4 @@
+import re
 from pydantic import BaseModel, validator
 from typing import List, Optional, Literal
 
@@ -9,6 +10,7 @@ class QuizQuestionResponse(BaseModel):
     complexity: int
     attempts_remaining: int
     error: Optional[str] = None
+    state_token: Optional[str] = None
 
 class AnswerRequestQuiz(BaseModel):
     answer: str
@@ -19,6 +21,7 @@ class AnswerCheckResponse(BaseModel):
     attempts_remaining: Optional[int] = None
     hint: Optional[str] = None
     complexity: Optional[int] = None
+    state_token: Optional[str] = None
 
 class BreakOptionsResponse(BaseModel):
     options: List[str]
@@ -26,9 +29,30 @@ class BreakOptionsResponse(BaseModel):
 class ResetResponse(BaseModel):
     message: str
     status: bool
+    state_token: Optional[str] = None
 
 class QueryRequest(BaseModel):
     query: str
+    # Optional id to keep several separate conversations within one session
+    conversation_id: Optional[str] = None
+
+    @validator('conversation_id')
+    def validate_conversation_id(cls, v):
+        if v is not None and not re.match(r'^[A-Za-z0-9_-]{1,64}$', v):
+            raise ValueError('conversation_id must be 1-64 letters, digits, "-" or "_"')
+        return v
+
+class BatchQueryRequest(BaseModel):
+    # Independent questions, answered without conversation history
+    queries: List[str]
+
+    @validator('queries')
+    def validate_queries(cls, v):
+        if not v:
+            raise ValueError('queries must not be empty')
+        if any(not query.strip() for query in v):
+            raise ValueError('queries must not be blank')
+        return v
 
 class AnswerRequestRiddle(BaseModel):
     user_answer: str
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.answer_matching import match_answer, parse_aliases
+
+
+@pytest.mark.parametrize("user_answer, answer", [
+    ("Decentralisation", "Decentralization"),
+    ("Tendermnt", "Tendermint"),
+    ("prof of stake", "Proof of Stake"),
+    ("the BNB Chain", "BNB chain"),
+    ("chain BNB", "BNB Chain"),
+])
+def test_accepts_misspellings_and_rewordings(user_answer, answer):
+    assert match_answer(user_answer, answer) is True
+
+
+@pytest.mark.parametrize("user_answer, answer", [
+    ("centralization", "Decentralization"),
+    ("unstaking", "Staking"),
+    ("mining", "Minting"),
+    ("minting", "Mining"),
+    ("validator", "validators"),
+    ("Layer 1", "Layer 2"),
+])
+def test_does_not_accept_changed_meanings(user_answer, answer):
+    assert match_answer(user_answer, answer) is not True
+
+
+def test_aliases_and_clear_misses():
+    aliases = parse_aliases("BSC; Binance Smart Chain | none")
+    assert aliases == ["BSC", "Binance Smart Chain"]
+    assert match_answer("bsc", "BNB Chain", aliases) is True
+    assert match_answer("xyz", "BNB Chain", aliases) is False
@@ -0,0 +1,72 @@
+import os
+import sys
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.content_pool import ContentPool
+from ai_engine.text_utils import normalize_text
+
+
+def make_pool(producer=None, **kwargs):
+    async def nothing(level):
+        return None
+    kwargs.setdefault("levels", [1, 2])
+    return ContentPool("test", producer or nothing, key=lambda item: normalize_text(item["question"]), **kwargs)
+
+
+def test_put_drops_repeated_items():
+    pool = make_pool()
+    assert pool.put(1, {"question": "What is BNB?"})
+    assert not pool.put(1, {"question": "what is  BNB"})
+    # Repeats are detected across levels and after the first item was served
+    assert not pool.put(2, {"question": "What is BNB?"})
+    pool.take(1)
+    assert not pool.put(1, {"question": "What is BNB?"})
+    assert pool.put(1, {"question": "What is a validator?"})
+    assert pool.stats()["duplicates"] == 3
+
+
+def test_recent_keys_are_bounded():
+    pool = make_pool(recent_size=2)
+    for question in ("one", "two", "three"):
+        assert pool.put(1, {"question": question})
+    assert pool.put(2, {"question": "one"})
+    assert not pool.put(2, {"question": "three"})
+
+
+def test_refill_keeps_only_unique_items():
+    questions = iter(["Q1", "Q1", "q1!", "Q2", "Q3"] + [f"Q{i}" for i in range(4, 20)])
+
+    async def producer(level):
+        return {"question": next(questions)}
+
+    async def run():
+        pool = make_pool(producer, levels=[1], min_size=3, max_parallel=5)
+        await pool.start()
+        await asyncio.sleep(0.05)
+        await pool.stop()
+        return pool
+
+    pool = asyncio.run(run())
+    assert [item["question"] for item in pool._items[1]] == ["Q1", "Q2", "Q3"]
+    assert pool.duplicates == 2
+
+
+def test_failed_calls_are_not_counted_as_discards():
+    outcomes = iter([RuntimeError("quota exceeded"), None, {"question": "Q1"}])
+
+    async def producer(level):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def run():
+        pool = make_pool(producer)
+        return [await pool.produce(1) for _ in range(3)], pool.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [None, None, {"question": "Q1"}]
+    assert (stats["failed"], stats["discarded"], stats["produced"]) == (1, 1, 1)
+    assert stats["discard_rate"] == 0.5
@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.corpus_snapshot import CorpusSnapshot
+from ai_engine.html_loader import parse_html
+
+PAGE = "<html><head><title>Validators</title></head><body><h1>Staking</h1><p>Validators stake BNB.</p></body></html>"
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """
+    Serves ``server.pages`` and records each request.
+
+    ``/etag/...`` answers with an ETag, ``/modified/...`` with Last-Modified and
+    ``/plain/...`` with neither; conditional requests get a 304 when they match.
+    """
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        body = self.server.pages.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        validators = {}
+        if self.path.startswith("/etag/"):
+            validators["ETag"] = f'"{hash(body) & 0xffffffff:x}"'
+            not_modified = self.headers.get("If-None-Match") == validators["ETag"]
+        elif self.path.startswith("/modified/"):
+            validators["Last-Modified"] = LAST_MODIFIED
+            not_modified = self.headers.get("If-Modified-Since") == LAST_MODIFIED
+        else:
+            not_modified = False
+
+        self.send_response(304 if not_modified else 200)
+        for name, value in validators.items():
+            self.send_header(name, value)
+        if not_modified:
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    server.pages, server.requests = {}, []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    return CorpusSnapshot(path=str(tmp_path / "snapshot.json"))
+
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def fetch_and_store(snapshot, source):
+    """What ingestion does for a changed source: parse the body the check fetched and snapshot it."""
+    checked = snapshot.check_source(source)
+    if checked is None:
+        return None
+    validators, body = checked
+    documents = parse_html(body, source)
+    snapshot.store(source, [[doc.page_content, doc.metadata] for doc in documents], validators)
+    return documents
+
+
+def test_etag_revalidation(server, snapshot):
+    source = url(server, "/etag/page")
+    server.pages["/etag/page"] = PAGE
+
+    documents = fetch_and_store(snapshot, source)
+    assert [doc.metadata["section"] for doc in documents] == ["Staking"]
+    assert "Validators stake BNB." in documents[0].page_content
+    assert snapshot.sources[source]["etag"]
+
+    assert snapshot.check_source(source) is None
+    assert server.requests[-1][1]["If-None-Match"] == snapshot.sources[source]["etag"]
+    # One request per check: the body is never fetched a second time
+    assert len(server.requests) == 2
+
+
+def test_last_modified_revalidation(server, snapshot):
+    source = url(server, "/modified/page")
+    server.pages["/modified/page"] = PAGE
+
+    fetch_and_store(snapshot, source)
+    assert snapshot.sources[source]["last_modified"] == LAST_MODIFIED
+    assert snapshot.check_source(source) is None
+    assert server.requests[-1][1]["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_same_body_without_validators(server, snapshot):
+    source = url(server, "/plain/page")
+    server.pages["/plain/page"] = PAGE
+
+    fetch_and_store(snapshot, source)
+    content_hash = snapshot.sources[source]["content_hash"]
+    assert snapshot.check_source(source) is None
+    assert snapshot.sources[source]["content_hash"] == content_hash
+
+
+def test_changed_body_is_returned_once(server, snapshot):
+    source = url(server, "/plain/page")
+    server.pages["/plain/page"] = PAGE
+    fetch_and_store(snapshot, source)
+
+    server.pages["/plain/page"] = PAGE.replace("stake BNB", "stake and delegate BNB")
+    documents = fetch_and_store(snapshot, source)
+    assert "stake and delegate BNB" in documents[0].page_content
+    assert len(server.requests) == 2
+
+    # The recorded hash is that of the indexed body, so the next check sees no change
+    assert snapshot.check_source(source) is None
+
+
+def test_local_file(tmp_path, snapshot):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4")
+
+    validators, body = snapshot.check_source(str(path))
+    assert body is None
+    snapshot.store(str(path), [["text", {}]], validators)
+    assert snapshot.check_source(str(path)) is None
+
+    path.write_bytes(b"%PDF-1.4 changed")
+    assert snapshot.check_source(str(path)) is not None
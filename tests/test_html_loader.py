@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.html_loader import parse_html
+
+PAGE = """<html><head><title>QuestBot Docs</title></head><body>
+<header><nav><a href="/">Home</a></nav><p>Site banner</p></header>
+<main>
+  <article>
+    <header><h1>Why QuestBot</h1><p>A short introduction.</p></header>
+    <p>QuestBot teaches the BNB ecosystem.</p>
+    <section>
+      <header><h2>Games</h2></header>
+      <p>Quizzes and riddles.</p>
+      <footer><p>Section note.</p></footer>
+    </section>
+  </article>
+  <aside>Related links</aside>
+</main>
+<footer><p>Copyright QuestBot</p></footer>
+</body></html>"""
+
+
+def test_headers_inside_content_are_kept():
+    documents = parse_html(PAGE, "https://example.com/why")
+    assert [doc.metadata["section"] for doc in documents] == ["Why QuestBot", "Games"]
+    assert documents[0].metadata["title"] == "QuestBot Docs"
+    assert "A short introduction." in documents[0].page_content
+    assert "QuestBot teaches the BNB ecosystem." in documents[0].page_content
+    assert "Section note." in documents[1].page_content
+
+
+def test_page_chrome_is_skipped():
+    text = "\n".join(doc.page_content for doc in parse_html(PAGE))
+    for chrome in ("Home", "Site banner", "Related links", "Copyright"):
+        assert chrome not in text
+
+
+def test_content_after_page_header_is_kept():
+    documents = parse_html("<body><header><p>Banner</p></header><article><h1>Title</h1><p>Text</p></article></body>")
+    assert [doc.page_content for doc in documents] == ["Title\nText"]
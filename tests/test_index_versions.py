@@ -0,0 +1,71 @@
+import os
+import sys
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.index_versions import FileLock, IndexVersions
+
+
+def publish_many(path, worker, count):
+    versions = IndexVersions(path)
+    for i in range(count):
+        versions.publish(f"w{worker}-{i:03d}", {"chunks": i})
+
+
+def test_publish_retires_previous_version(tmp_path):
+    versions = IndexVersions(str(tmp_path / "versions.json"))
+    versions.publish("v1", {"chunks": 1})
+    versions.publish("v2", {"chunks": 2})
+
+    reloaded = IndexVersions(versions.path)
+    assert reloaded.current == "v2"
+    assert "retired_at" in reloaded.versions["v1"]
+    assert "retired_at" not in reloaded.versions["v2"]
+
+
+def test_versions_are_kept_for_the_grace_period(tmp_path):
+    versions = IndexVersions(str(tmp_path / "versions.json"))
+    for version in ("v1", "v2", "v3"):
+        versions.publish(version, {})
+
+    assert versions.retire_expired(keep=2, grace=3600) == []
+    assert versions.retire_expired(keep=1, grace=3600) == []
+    assert versions.retire_expired(keep=1, grace=0) == ["v1", "v2"]
+    assert (versions.current, list(versions.versions)) == ("v3", ["v3"])
+
+
+def test_concurrent_publishes_are_not_lost(tmp_path):
+    path = str(tmp_path / "versions.json")
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=publish_many, args=(path, worker, 25)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert len(IndexVersions(path).versions) == 100
+
+
+def test_build_lock_is_exclusive(tmp_path):
+    versions = IndexVersions(str(tmp_path / "versions.json"))
+    held = versions.build_lock()
+    assert held.acquire(blocking=False)
+    assert held.acquire(blocking=False)
+
+    other = FileLock(held.path)
+    assert not other.acquire(blocking=False)
+    held.release()
+    assert other.acquire(blocking=False)
+    other.release()
+
+
+def test_modified_changes_on_publish(tmp_path):
+    versions = IndexVersions(str(tmp_path / "versions.json"))
+    assert versions.modified() is None
+    versions.publish("v1", {})
+    first = versions.modified()
+    os.utime(versions.path, ns=(first - 10 ** 9, first - 10 ** 9))
+    versions.publish("v2", {})
+    assert versions.modified() != first - 10 ** 9
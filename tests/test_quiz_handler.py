@@ -0,0 +1,54 @@
+import os
+import sys
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import quiz_handler
+from ai_engine.quiz_handler import BlockchainQuizGame
+
+
+def make_game(options, answer):
+    game = BlockchainQuizGame()
+    game.current_question = "Question"
+    game.current_options = options
+    game.current_answer = answer
+    game.current_hint = "Hint"
+    return game
+
+
+def test_numeric_option_text_is_matched_before_option_numbers():
+    game = make_game(["A) 21", "B) 3", "C) 7", "D) 100"], "A")
+    result = asyncio.run(game.check_answer("21"))
+    assert result["correct"] is True
+
+    game = make_game(["A) 21", "B) 3", "C) 7", "D) 100"], "B")
+    assert game._resolve_option("3") == "B"
+    assert game._resolve_option("4") == "D"
+    assert game._resolve_option("100") == "D"
+
+
+def test_out_of_range_option_number_is_rejected():
+    game = make_game(["A) Proof of Stake", "B) Proof of Work", "C) DPoS", "D) PoA"], "C")
+    result = asyncio.run(game.check_answer("9"))
+    assert (result["correct"], result["message"]) == (False, "Invalid option number")
+
+
+def test_answer_letter_needs_a_delimiter():
+    assert make_game([], "B) Validators")._answer_letter() == "B"
+    assert make_game([], "(c).")._answer_letter() == "C"
+    assert make_game([], "d")._answer_letter() == "D"
+    assert make_game([], "A decentralized exchange")._answer_letter() is None
+
+
+def test_answer_without_letter_is_verified_as_text(monkeypatch):
+    seen = []
+
+    async def verify(self, correct_answer, user_answer):
+        seen.append((correct_answer, user_answer))
+        return True
+
+    monkeypatch.setattr(quiz_handler.BlockchainQuizGame, "verify_answer", verify)
+    game = make_game([], "A decentralized exchange")
+    assert asyncio.run(game.check_answer("a DEX"))["correct"] is True
+    assert seen == [("A decentralized exchange", "a DEX")]
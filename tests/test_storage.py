@@ -0,0 +1,277 @@
+import os
+import sys
+import time
+import asyncio
+import fnmatch
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine.storage import MemoryBackend, RedisBackend, RedisError, SQLiteBackend
+from ai_engine.session_store import SessionStore
+
+
+class Game:
+    __slots__ = ("score", "answers")
+
+    def __init__(self):
+        self.score = 0
+        self.answers = []
+
+
+class RespServer:
+    """
+    Tiny in-process Redis stand-in speaking RESP2 over asyncio.
+
+    Implements the commands ``RedisBackend`` uses: GET, SET (with PX), DEL, SCAN,
+    AUTH and SELECT, plus a way to drop every client connection.
+    """
+
+    def __init__(self, password=None):
+        self.password = password
+        self.databases = {}
+        self.commands = []
+        self._writers = set()
+        self._loop = asyncio.new_event_loop()
+        self._thread = None
+        self._server = None
+        self.port = None
+
+    def start(self):
+        started = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            # Shut down cleanly: stop accepting, close clients and let their handlers finish
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            handlers = asyncio.all_tasks(self._loop)
+            if handlers:
+                self._loop.run_until_complete(asyncio.wait(handlers, timeout=5))
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        started.wait(5)
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    def drop_connections(self):
+        """Close every client connection, as a server restart would."""
+        def close():
+            for writer in list(self._writers):
+                writer.close()
+        self._loop.call_soon_threadsafe(close)
+        time.sleep(0.1)
+
+    @staticmethod
+    async def _read_command(reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    @staticmethod
+    def _encode(reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, list):
+            return b"*%d\r\n" % len(reply) + b"".join(RespServer._encode(item) for item in reply)
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        db, authenticated = 0, self.password is None
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                name = args[0].upper()
+                self.commands.append(name)
+                data = self.databases.setdefault(db, {})
+                if name == b"AUTH":
+                    authenticated = args[1].decode() == self.password
+                    writer.write(b"+OK\r\n" if authenticated else b"-WRONGPASS invalid password\r\n")
+                elif not authenticated:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                elif name == b"SELECT":
+                    db = int(args[1])
+                    writer.write(b"+OK\r\n")
+                elif name == b"SET":
+                    expires_at = time.monotonic() + int(args[4]) / 1000 if len(args) > 4 else float("inf")
+                    data[args[1]] = (args[2], expires_at)
+                    writer.write(b"+OK\r\n")
+                elif name == b"GET":
+                    entry = data.get(args[1])
+                    live = entry is not None and entry[1] > time.monotonic()
+                    writer.write(self._encode(entry[0] if live else None))
+                elif name == b"DEL":
+                    writer.write(self._encode(int(data.pop(args[1], None) is not None)))
+                elif name == b"SCAN":
+                    pattern = args[3].decode()
+                    now = time.monotonic()
+                    keys = [key for key, (_, expires_at) in data.items()
+                            if expires_at > now and fnmatch.fnmatchcase(key.decode(), pattern)]
+                    writer.write(self._encode([b"0", keys]))
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+@pytest.fixture
+def resp_server():
+    server = RespServer(password="secret")
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def redis_backend(resp_server):
+    backend = RedisBackend(f"redis://:secret@127.0.0.1:{resp_server.port}/2")
+    yield backend
+    backend._close()
+
+
+def test_redis_set_get_delete(redis_backend, resp_server):
+    redis_backend.set("quiz:a", b"state")
+    assert redis_backend.get("quiz:a") == b"state"
+    assert redis_backend.get("quiz:missing") is None
+    assert b"quiz:a" in resp_server.databases[2]
+
+    redis_backend.delete("quiz:a")
+    assert redis_backend.get("quiz:a") is None
+    # Authenticated and selected the database once, on connect
+    assert resp_server.commands[:2] == [b"AUTH", b"SELECT"]
+    assert resp_server.commands.count(b"AUTH") == 1
+
+
+def test_redis_ttl(redis_backend):
+    redis_backend.set("quiz:a", b"state", ttl=0.05)
+    assert redis_backend.get("quiz:a") == b"state"
+    time.sleep(0.1)
+    assert redis_backend.get("quiz:a") is None
+
+
+def test_redis_count_by_prefix(redis_backend):
+    for i in range(3):
+        redis_backend.set(f"quiz:{i}", b"x")
+    redis_backend.set("riddle:0", b"x")
+    assert redis_backend.count("quiz:") == 3
+    assert redis_backend.count("riddle:") == 1
+
+
+def test_redis_reconnects_after_connection_drop(redis_backend, resp_server):
+    redis_backend.set("quiz:a", b"state")
+    resp_server.drop_connections()
+    assert redis_backend.get("quiz:a") == b"state"
+    assert resp_server.commands.count(b"AUTH") == 2
+
+
+def test_redis_error_reply(resp_server):
+    backend = RedisBackend(f"redis://:wrong@127.0.0.1:{resp_server.port}/0")
+    with pytest.raises(RedisError):
+        backend.get("quiz:a")
+    backend._close()
+
+
+def test_session_store_over_redis(redis_backend):
+    store = SessionStore(Game, "quiz", backend=redis_backend)
+    game = Game()
+    game.score = 3
+    game.answers = ["B", "D"]
+
+    async def roundtrip():
+        await store.asave("player", game)
+        return await store.aget("player"), await store.astats()
+
+    loaded, stats = asyncio.run(roundtrip())
+    assert (loaded.score, loaded.answers) == (3, ["B", "D"])
+    assert stats == {"sessions": 1}
+
+
+def test_sqlite_backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "sessions.db"))
+    backend.set("quiz:a", b"state")
+    backend.set("quiz:b", b"state", ttl=0.01)
+    time.sleep(0.05)
+    assert backend.get("quiz:a") == b"state"
+    assert backend.get("quiz:b") is None
+    assert backend.count("quiz:") == 1
+
+
+def test_memory_backend_namespace_counts():
+    backend = MemoryBackend(capacity=3)
+    backend.set("quiz:a", 1)
+    backend.set("quiz:a", 2)
+    backend.set("quiz:b", 1)
+    backend.set("riddle:a", 1, ttl=0.01)
+    assert (backend.count("quiz:"), backend.count("riddle:"), backend.count()) == (2, 1, 3)
+
+    # Eviction, expiry and deletion all update the counts
+    backend.set("rag:a", 1)
+    assert backend.count("quiz:") == 1 and backend.evicted == 1
+    time.sleep(0.02)
+    assert backend.get("riddle:a") is None
+    assert backend.count("riddle:") == 0
+    backend.delete("quiz:b")
+    backend.delete("quiz:b")
+    assert backend.count("quiz:") == 0
+    assert backend.count("rag:") == 1
+    assert backend.count("ra") == 1
+
+
+def test_memory_backend_size_limit():
+    backend = MemoryBackend(capacity=100, max_bytes=10, sizeof=len)
+    backend.set("rag:a", "xxxx")
+    backend.set("rag:b", "xxxx")
+    assert backend.bytes == 8
+
+    # Growing an entry replaces its size, and the least recently used entries make room
+    backend.get("rag:a")
+    backend.set("rag:b", "xxxxxxx")
+    assert backend.get("rag:a") is None
+    assert (backend.bytes, backend.count("rag:"), backend.evicted) == (7, 1, 1)
+
+    # An entry larger than the limit is still kept on its own
+    backend.set("rag:c", "x" * 20)
+    assert backend.count() == 1 and backend.bytes == 20
+    backend.delete("rag:c")
+    assert backend.bytes == 0
+
+
+def test_session_calls_do_not_queue_behind_llm_calls(tmp_path, monkeypatch):
+    from ai_engine import llm_client
+
+    async def busy(*args, **kwargs):
+        raise AssertionError("session storage must not use the LLM executor")
+
+    monkeypatch.setattr(llm_client, "run_blocking", busy)
+    store = SessionStore(Game, "quiz", backend=SQLiteBackend(str(tmp_path / "sessions.db")))
+
+    async def roundtrip():
+        await store.asave("player", Game())
+        return await store.aget("player")
+
+    assert asyncio.run(roundtrip()).score == 0